@@ -2,6 +2,9 @@ import logging
 from typing import Annotated, Optional
 from datetime import datetime
 import asyncio
+import os
+import time
+from collections import deque
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -18,29 +21,89 @@ from livekit.plugins import deepgram, silero, turn_detector, google
 from tools import (
     create_or_update_interview,
     update_interview_feedback,
-    store_interview_transcript
+    store_interview_transcript,
+    get_transcript_writer,
+    close_transcript_writer
 )
-from utils import ai_prompt, execute_db_operation
+from utils import ai_prompt, build_prompt, prompt_variant_sizes, get_prisma_client
+from utils.prompt import estimate_tokens
+from utils.telemetry import clear_interview_timings, record_timing, serve_metrics, start_metrics_writer, write_snapshot
+from utils.runtime_monitor import spawn, start_loop_monitor
+from tools.db_operations import save_latency_summary
+from pipeline import (
+    enable_batched_eou,
+    AdaptiveEndpointing,
+    CachedTTS,
+    ChatContextWindow,
+    TurnLatencyTracer
+)
+from pipeline.endpointing import ENDPOINTING_MIN_DELAY, ENDPOINTING_MAX_DELAY
 
-# Import WebSocket connection functions
-from tools.socket_client import connect_socket, join_interview_room, disconnect_socket
+# Per-interview WebSocket connection
+from tools.socket_client import SocketSession
 
 load_dotenv(dotenv_path=".env.local")
 logger = logging.getLogger("voice-agent")
 
+# Warm job processes kept ready for new interviews; unset keeps LiveKit's default
+AGENT_IDLE_PROCESSES = os.environ.get("AGENT_IDLE_PROCESSES")
+
+# Run Silero VAD in the worker's shared inference process instead of
+# loading a copy of the model into every job process
+SHARED_VAD = os.environ.get("SHARED_VAD", "0") == "1"
+
+# Micro-batch end-of-utterance inference across all interviews on the worker
+EOU_BATCHING = os.environ.get("EOU_BATCHING", "0") == "1"
+
+# Learn endpointing delays from each candidate's pauses (see pipeline/endpointing.py)
+ADAPTIVE_ENDPOINTING = os.environ.get("ADAPTIVE_ENDPOINTING", "1") == "1"
+
+# Start generating the reply on every final transcript, before the turn is
+# confirmed; lowers response latency at the cost of discarded LLM requests
+SPECULATIVE_LLM = os.environ.get("SPECULATIVE_LLM", "0") == "1"
+
+# Transcript entries held while the interview is being created; the oldest
+# are dropped beyond this if creating it keeps failing
+PENDING_TRANSCRIPTS_MAX = int(os.environ.get("PENDING_TRANSCRIPTS_MAX", "500"))
+
+# Port for the Prometheus text endpoint (/metrics) served by the worker's
+# main process for all jobs; unset disables it
+METRICS_PORT = os.environ.get("METRICS_PORT")
+
+GREETING = "Hello, I'm your technical interviewer from Zoho. Thank you for joining this interview session. Let's start by getting to know a bit about you."
+
+
+def goodbye_message(status: str) -> str:
+    """Build the message said when an interview session ends"""
+    message = f"Thank you for participating in this interview. The session has been marked as {status}. "
+    
+    if status == "COMPLETED":
+        message += "Your interview has been recorded and will be reviewed by the hiring team. You will be notified about next steps soon."
+    elif status == "CANCELLED":
+        message += "If you wish to reschedule, please contact our HR department."
+    
+    message += " The session will end in 10 seconds. Goodbye!"
+    return message
+
+
+# Said the same way in every interview, so served from the TTS phrase cache
+FIXED_PHRASES = [GREETING] + [goodbye_message(status) for status in ("COMPLETED", "CANCELLED")]
 
 # Function to create an initial interview when a connection is established
-async def initialize_interview():
+async def initialize_interview(socket_session: SocketSession):
     """
     Create an initial empty interview when a connection is established.
     This allows for immediate transcript recording.
     
+    Args:
+        socket_session: The job's real-time connection
+    
     Returns:
         The interview ID if successful, None otherwise
     """
     try:
         # First connect to the WebSocket server for real-time updates
-        await connect_socket()
+        await socket_session.connect()
         
         result = await create_or_update_interview(
             position="Software Engineer",
@@ -52,6 +115,11 @@ async def initialize_interview():
             interview_id = result["interview_id"]
             logger.info(f"Created initial interview with ID: {interview_id}")
             
+            # Join the interview room for real-time updates before any
+            # transcript entry is broadcast to it
+            await socket_session.join(interview_id)
+            logger.info(f"Joined WebSocket room for interview: {interview_id}")
+            
             # Add a system message to mark the start of the interview
             system_message = f"Technical interview initialized at {datetime.now().isoformat()}"
             await store_interview_transcript(
@@ -60,10 +128,6 @@ async def initialize_interview():
                 content=system_message
             )
             
-            # Join the interview room for real-time updates
-            await join_interview_room(interview_id)
-            logger.info(f"Joined WebSocket room for interview: {interview_id}")
-            
             return interview_id
         else:
             logger.error("Failed to create initial interview")
@@ -73,8 +137,48 @@ async def initialize_interview():
         return None
 
 
+async def warm_connections(socket_session: SocketSession):
+    """
+    Open the database and WebSocket connections for this job.
+    
+    Both are bound to the job's event loop, so they cannot be opened in
+    prewarm; starting them as soon as the job begins overlaps their setup
+    with waiting for the participant.
+    """
+    started_at = time.perf_counter()
+    results = await asyncio.gather(
+        get_prisma_client(),
+        socket_session.connect(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Connection warmup failed: {result}")
+    logger.info(f"Warmed connections in {(time.perf_counter() - started_at) * 1000:.0f}ms")
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    """
+    Load models and build API clients once per process, before a job is assigned.
+    
+    The EOU turn-detector weights are loaded by the worker's shared inference
+    process; the model handle itself needs the job context and is created in
+    entrypoint. With SHARED_VAD the VAD weights live there too. Fixed phrases already in the TTS cache are read
+    into memory here; missing ones are synthesized once a job starts.
+    """
+    if SHARED_VAD:
+        # Imported only when enabled: it builds on the silero plugin's internals
+        from pipeline.shared_vad import SharedVAD
+        proc.userdata["vad"] = SharedVAD.create()
+    else:
+        proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["stt"] = deepgram.STT()
+    proc.userdata["llm"] = google.LLM(model="gemini-2.0-flash")
+    proc.userdata["tts"] = CachedTTS(google.TTS(), phrases=FIXED_PHRASES)
+    proc.userdata["tts"].prefill_cached()
+    logger.info(f"System prompt variants (estimated tokens): {prompt_variant_sizes()}")
+    if METRICS_PORT:
+        start_metrics_writer()
 
 
 async def entrypoint(ctx: JobContext):
@@ -84,18 +188,127 @@ async def entrypoint(ctx: JobContext):
         text=(ai_prompt),
     )
 
+    # Real-time updates for this interview only; closed with the job
+    socket_session = SocketSession()
+
+    # Event-loop lag, background task counts and queue backlogs, served with the metrics
+    loop_monitor = start_loop_monitor()
+
+    # Per-turn latency breakdown, stored with the interview when the job ends
+    latency_tracer = TurnLatencyTracer()
+
+    endpointing = AdaptiveEndpointing() if ADAPTIVE_ENDPOINTING else None
+    # System prompt, a running summary and the most recent turns only
+    context_window = ChatContextWindow()
+    # Built once the participant has joined
+    agent = None
+
+    async def save_latency():
+        if latency_tracer.interview_id:
+            summary = latency_tracer.summary()
+            if endpointing is not None:
+                summary["endpointing"] = endpointing.stats()
+            summary["context"] = context_window.stats()
+            try:
+                await save_latency_summary(latency_tracer.interview_id, summary)
+            except Exception as e:
+                logger.error(f"Error saving latency summary: {e}")
+        # Timings of interviews this job created but never saved
+        clear_interview_timings()
+        if METRICS_PORT:
+            write_snapshot()
+
+    async def shutdown():
+        # LiveKit runs shutdown callbacks concurrently, so the steps that
+        # depend on each other share one callback: the last transcript batch
+        # is written and broadcast before the socket closes, and its db
+        # timings are recorded before the interview's timings are cleared
+        await close_transcript_writer()
+        await socket_session.close()
+        await save_latency()
+        await loop_monitor.stop()
+
+    ctx.add_shutdown_callback(shutdown)
+
+    # Connect to the database and WebSocket server while the room connects
+    # and the participant joins
+    warmup_task = spawn(warm_connections(socket_session), "warmup")
+    # Synthesize fixed phrases that are not in the TTS cache yet
+    spawn(ctx.proc.userdata["tts"].prefill(), "tts_prefill")
+
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
 
     participant = await ctx.wait_for_participant()
+    joined_at = time.perf_counter()
     logger.info(f"starting voice assistant for participant {participant.identity}")
     
-    # Initialize an interview as soon as the participant joins
-    current_interview_id = await initialize_interview()
-    logger.info(f"Initialized interview for participant {participant.identity}: {current_interview_id}")
+    current_interview_id = None
+    # Set once the socket session has joined the interview's room, so every
+    # written entry can also be broadcast
+    transcript_interview_id = None
+    # Transcript entries spoken before then, in order
+    pending_transcripts = deque(maxlen=PENDING_TRANSCRIPTS_MAX)
+
+    def record_transcript(speaker_type: str, content: str):
+        if transcript_interview_id:
+            get_transcript_writer().submit(
+                interview_id=transcript_interview_id,
+                speaker_type=speaker_type,
+                content=content
+            )
+        else:
+            if len(pending_transcripts) == pending_transcripts.maxlen:
+                logger.warning(f"{len(pending_transcripts)} transcript entries pending without an interview, dropping the oldest")
+            pending_transcripts.append((speaker_type, content))
+
+    def flush_pending_transcripts():
+        if not transcript_interview_id:
+            return
+        for speaker_type, content in pending_transcripts:
+            record_transcript(speaker_type, content)
+        if pending_transcripts:
+            logger.info(f"Flushed {len(pending_transcripts)} transcript entries recorded before interview creation")
+        pending_transcripts.clear()
+
+    async def bootstrap_interview():
+        nonlocal current_interview_id, transcript_interview_id
+        await warmup_task
+        interview_id = await initialize_interview(socket_session)
+        # A tool call may already have created one while we were waiting
+        if interview_id and not current_interview_id:
+            current_interview_id = interview_id
+            transcript_interview_id = interview_id
+            latency_tracer.interview_id = interview_id
+        logger.info(f"Initialized interview for participant {participant.identity}: {current_interview_id}")
+        flush_pending_transcripts()
+
+    # Initialize the interview in the background so building the pipeline and
+    # greeting the candidate do not wait on database and socket round trips
+    interview_task = spawn(bootstrap_interview(), "interview_bootstrap")
+
+    # Interview details given so far, used to pick the system prompt
+    interview_profile = {}
+
+    def specialize_prompt(**details):
+        """Switch to the system prompt for the interview's role and level once they are known"""
+        interview_profile.update({key: value for key, value in details.items() if value})
+        prompt = build_prompt(**interview_profile)
+        for message in agent.chat_ctx.messages:
+            if message.role == "system":
+                if message.content != prompt:
+                    message.content = prompt
+                    logger.info(f"Using system prompt for {interview_profile} (~{estimate_tokens(prompt)} tokens)")
+                break
+
+    async def ensure_interview():
+        """Wait for the background interview initialization to finish"""
+        if not interview_task.done():
+            await asyncio.shield(interview_task)
     
     class TechnicalInterviewFnc(llm.FunctionContext):
         @llm.ai_callable()
+        @latency_tracer.traced
         async def create_interview_session(
             self,
             position: Annotated[
@@ -136,7 +349,8 @@ async def entrypoint(ctx: JobContext):
             ] = None
         ):
             """Called to create or update an interview session with all relevant details. Use this when you've gathered candidate information."""
-            nonlocal current_interview_id
+            nonlocal current_interview_id, transcript_interview_id
+            await ensure_interview()
             
             # If we have a current interview, update it
             if current_interview_id:
@@ -158,14 +372,13 @@ async def entrypoint(ctx: JobContext):
                 )
                 
                 if result and result.get("success"):
+                    specialize_prompt(position=position, department=department, level=level)
                     # Add system message about enhancing the interview with details
                     system_message = f"Enhanced interview with additional details at {datetime.now().isoformat()}"
-                    asyncio.create_task(
-                        store_interview_transcript(
-                            interview_id=current_interview_id,
-                            speaker_type="SYSTEM",
-                            content=system_message
-                        )
+                    await store_interview_transcript(
+                        interview_id=current_interview_id,
+                        speaker_type="SYSTEM",
+                        content=system_message
                     )
                     return result
                 else:
@@ -191,12 +404,18 @@ async def entrypoint(ctx: JobContext):
                 
                 if result and "success" in result and result["success"] and "interview_id" in result:
                     current_interview_id = result["interview_id"]
+                    latency_tracer.interview_id = current_interview_id
+                    specialize_prompt(position=position, department=department, level=level)
                     logger.info(f"Created new interview with ID: {current_interview_id}")
+                    await socket_session.join(current_interview_id)
+                    transcript_interview_id = current_interview_id
+                    flush_pending_transcripts()
                 
                 return result
             return {"success": False, "error": "Unknown error in interview handling"}
         
         @llm.ai_callable()
+        @latency_tracer.traced
         async def update_feedback(
             self,
             interview_id: Annotated[
@@ -245,6 +464,7 @@ async def entrypoint(ctx: JobContext):
         ):
             """Called to update interview feedback and status with detailed evaluation as the interview progresses or concludes."""
             nonlocal current_interview_id
+            await ensure_interview()
             
             # If interview_id not provided, use the current interview
             if not interview_id and current_interview_id:
@@ -278,7 +498,7 @@ async def entrypoint(ctx: JobContext):
                 )
                 
                 # Schedule room closing
-                asyncio.create_task(self.end_interview_session(status))
+                spawn(self.end_interview_session(status), "end_interview")
             
             return result
         
@@ -291,22 +511,13 @@ async def entrypoint(ctx: JobContext):
         ):
             """End the interview session and close the room after giving final feedback. Call this when the interview is complete."""
             nonlocal current_interview_id, agent
+            await ensure_interview()
             
             if not current_interview_id:
                 return {"success": False, "error": "No active interview session"}
                 
             # Say goodbye and inform about disconnection
-            goodbye_message = f"Thank you for participating in this interview. The session has been marked as {status}. "
-            
-            if status == "COMPLETED":
-                goodbye_message += "Your interview has been recorded and will be reviewed by the hiring team. You will be notified about next steps soon."
-            elif status == "CANCELLED":
-                goodbye_message += "If you wish to reschedule, please contact our HR department."
-            
-            goodbye_message += " The session will end in 10 seconds. Goodbye!"
-            
-            # Say goodbye
-            await agent.say(goodbye_message, allow_interruptions=False)
+            await agent.say(goodbye_message(status), allow_interruptions=False)
             
             # Record final system message
             await store_interview_transcript(
@@ -318,8 +529,9 @@ async def entrypoint(ctx: JobContext):
             # Wait a moment to ensure message is heard
             await asyncio.sleep(10)
             
-            # Disconnect from the WebSocket
-            await disconnect_socket()
+            # Disconnect this interview's WebSocket; other interviews in
+            # this worker keep their own connections
+            await socket_session.close()
             logger.info("Disconnected from WebSocket server")
             
             # Removed room disconnection
@@ -337,75 +549,96 @@ async def entrypoint(ctx: JobContext):
 
     agent = VoicePipelineAgent(
         vad=ctx.proc.userdata["vad"],
-        stt=deepgram.STT(),
-        llm=google.LLM(model="gemini-2.0-flash"),
-        tts=google.TTS(),
+        stt=ctx.proc.userdata["stt"],
+        llm=ctx.proc.userdata["llm"],
+        tts=ctx.proc.userdata["tts"],
         turn_detector=turn_detector.EOUModel(),
-        min_endpointing_delay=0.5,
-        max_endpointing_delay=5.0,
+        min_endpointing_delay=ENDPOINTING_MIN_DELAY,
+        max_endpointing_delay=ENDPOINTING_MAX_DELAY,
         chat_ctx=initial_ctx,
-        fnc_ctx=fnc_ctx
+        fnc_ctx=fnc_ctx,
+        before_llm_cb=context_window.before_llm_cb,
+        preemptive_synthesis=SPECULATIVE_LLM
     )
 
+    if endpointing is not None:
+        endpointing.attach(agent)
+
     usage_collector = metrics.UsageCollector()
+    first_audio_at = None
+
+    @agent.on("agent_started_speaking")
+    def on_agent_started_speaking():
+        nonlocal first_audio_at
+        latency_tracer.on_agent_started_speaking()
+        if first_audio_at is None:
+            first_audio_at = time.perf_counter()
+            record_timing("join_to_first_audio", first_audio_at - joined_at, latency_tracer.interview_id)
+            latency_ms = (first_audio_at - joined_at) * 1000
+            logger.info(
+                f"Join to first audio: {latency_ms:.0f}ms",
+                extra={"join_to_first_audio_ms": round(latency_ms, 1)}
+            )
 
     @agent.on("metrics_collected")
     def on_metrics_collected(agent_metrics: metrics.AgentMetrics):
         metrics.log_metrics(agent_metrics)
         usage_collector.collect(agent_metrics)
+        latency_tracer.on_metrics(agent_metrics)
+        context_window.on_metrics(agent_metrics)
 
     @agent.on("user_speech_committed")
     def on_user_speech_committed(msg=None):
         try:
-            if msg and current_interview_id:
+            if msg:
                 # Extract text content from the message
                 content = msg.content if hasattr(msg, 'content') else (msg.text if hasattr(msg, 'text') else str(msg))
                 
-                # Store candidate's speech in transcript
-                asyncio.create_task(
-                    store_interview_transcript(
-                        interview_id=current_interview_id,
-                        speaker_type="CANDIDATE",
-                        content=content
-                    )
-                )
-                logger.info(f"Stored candidate transcript: {content[:30]}...")
+                # Store candidate's speech in transcript (held until the interview exists)
+                record_transcript("CANDIDATE", content)
+                logger.info(f"Queued candidate transcript: {content[:30]}...")
             else:
-                logger.warning("Cannot store candidate transcript: No message or interview ID")
+                logger.warning("Cannot store candidate transcript: No message")
         except Exception as e:
             logger.error(f"Error storing candidate transcript: {e}")
 
     @agent.on("agent_speech_committed")
     def on_agent_speech_committed(msg=None):
         try:
-            if msg and current_interview_id:
+            if msg:
                 # Extract text content from the message
                 content = msg.content if hasattr(msg, 'content') else (msg.text if hasattr(msg, 'text') else str(msg))
                 
-                # Store agent's speech in transcript
-                asyncio.create_task(
-                    store_interview_transcript(
-                        interview_id=current_interview_id,
-                        speaker_type="AGENT",
-                        content=content
-                    )
-                )
-                logger.info(f"Stored agent transcript: {content[:30]}...")
+                # Store agent's speech in transcript (held until the interview exists)
+                record_transcript("AGENT", content)
+                logger.info(f"Queued agent transcript: {content[:30]}...")
             else:
-                logger.warning("Cannot store agent transcript: No message or interview ID")
+                logger.warning("Cannot store agent transcript: No message")
         except Exception as e:
             logger.error(f"Error storing agent transcript: {e}")
 
     agent.start(ctx.room, participant)
 
     # Greet the candidate when agent joins
-    await agent.say("Hello, I'm your technical interviewer from Zoho. Thank you for joining this interview session. Let's start by getting to know a bit about you.", allow_interruptions=True)
+    await agent.say(GREETING, allow_interruptions=True)
 
 
 if __name__ == "__main__":
+    if EOU_BATCHING:
+        enable_batched_eou()
+    if SHARED_VAD:
+        from pipeline.shared_vad import enable_shared_vad
+        enable_shared_vad()
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT))
+
+    worker_options = {}
+    if AGENT_IDLE_PROCESSES:
+        worker_options["num_idle_processes"] = int(AGENT_IDLE_PROCESSES)
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
-            prewarm_fnc=prewarm
+            prewarm_fnc=prewarm,
+            **worker_options
         ),
     )
@@ -1,7 +1,13 @@
 import logging
-from typing import Optional, List
+import asyncio
+import os
+import time
+import json
+import base64
+from typing import Optional, List, Dict, Any, Tuple, Literal
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
 
 from db import prisma
@@ -11,75 +17,145 @@ logger = logging.getLogger("emergency-api")
 
 apis = APIRouter()
 
+SESSION_STATUSES = ["ACTIVE", "EMERGENCY_VERIFIED", "DISPATCHED", "COMPLETED",
+                    "DROPPED", "TRANSFERRED", "NON_EMERGENCY"]
+EMERGENCY_TYPES = ["MEDICAL", "POLICE", "FIRE", "OTHER"]
+
+# Dashboard pollers within this window share one computation
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+
+# Largest sessions page; limits outside 1..SESSIONS_PAGE_MAX are clamped
+SESSIONS_PAGE_MAX = 100
+
+# Transcript rows fetched per page / per database round trip when streaming
+TRANSCRIPT_PAGE_SIZE = int(os.getenv("TRANSCRIPT_PAGE_SIZE", "200"))
+
+_stats_cache: Dict[str, Any] = {"value": None, "expires": 0.0}
+_stats_inflight: Optional[asyncio.Future] = None
+
 @apis.get("/health")
 async def health_check():
     """Simple health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+def _encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor"""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by _encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _keyset_after(field: str, cursor: str, descending: bool) -> Dict[str, Any]:
+    """Build a where clause selecting rows strictly after the cursor position"""
+    timestamp, row_id = _decode_cursor(cursor)
+    op = "lt" if descending else "gt"
+    return {
+        "OR": [
+            {field: {op: timestamp}},
+            {field: timestamp, "id": {op: row_id}}
+        ]
+    }
+
+SESSION_RELATIONS = {
+    "caller": True,
+    "location": True,
+    "dispatches": {
+        "include": {
+            "responder": True
+        }
+    }
+}
+
+async def _stream_json_page(key: str, rows: List[Any], next_cursor: Optional[str], fields: Optional[set] = None):
+    """Stream a page of models as a JSON object, serializing one row at a time"""
+    yield f'{{"success": true, "{key}": ['
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + json.dumps(jsonable_encoder(row.dict(include=fields)))
+    yield f'], "count": {len(rows)}, "next_cursor": {json.dumps(next_cursor)}}}'
+
 @apis.get("/sessions")
 async def list_sessions(
     status: Optional[str] = None,
     emergency_type: Optional[str] = None,
-    limit: int = 100
+    limit: int = Query(100, description=f"Page size, clamped to 1-{SESSIONS_PAGE_MAX}"),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relations are only loaded when listed")
 ):
-    """List all sessions with optional filters for frontend display"""
+    """
+    List sessions newest first with optional filters for frontend display.
+    
+    Pages by (createdAt, id); pass the returned next_cursor to get the next page.
+    """
     try:
-        where = {}
+        limit = min(max(limit, 1), SESSIONS_PAGE_MAX)
+        where: Dict[str, Any] = {}
 
         if status:
             where["status"] = status
             
         if emergency_type:
             where["emergencyType"] = emergency_type
+
+        if cursor:
+            where = {"AND": [where, _keyset_after("createdAt", cursor, descending=True)]}
+
+        selected = None
+        include = SESSION_RELATIONS
+        if fields:
+            selected = {f.strip() for f in fields.split(",") if f.strip()} | {"id", "createdAt"}
+            include = {k: v for k, v in SESSION_RELATIONS.items() if k in selected}
         
         sessions = await prisma.session.find_many(
             where=where,
-            include={
-                "caller": True,
-                "location": True,
-                "dispatches": {
-                    "include": {
-                        "responder": True
-                    }
-                }
-            },
-            order_by={
-                "createdAt": "desc"
-            },
-            take=limit 
+            include=include or None,
+            order_by=[
+                {"createdAt": "desc"},
+                {"id": "desc"}
+            ],
+            take=limit + 1
         )
+
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = _encode_cursor(sessions[-1].createdAt, sessions[-1].id)
         
-        serializable_sessions = [s.dict() for s in sessions]
-        
-        return {
-            "success": True, 
-            "sessions": serializable_sessions,
-            "count": len(serializable_sessions)
-        }
+        return StreamingResponse(
+            _stream_json_page("sessions", sessions, next_cursor, selected),
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @apis.get("/sessions/{session_id}")
-async def get_session(session_id: str):
+async def get_session(
+    session_id: str,
+    include_transcripts: bool = Query(True, description="Embed the full transcript; use /sessions/{id}/transcripts for long sessions")
+):
     """Get detailed information about a specific session"""
     try:
+        include: Dict[str, Any] = dict(SESSION_RELATIONS)
+        if include_transcripts:
+            include["transcripts"] = {
+                "order_by": [
+                    {"timestamp": "asc"},
+                    {"id": "asc"}
+                ]
+            }
+
         session = await prisma.session.find_unique(
             where={"id": session_id},
-            include={
-                "caller": True,
-                "location": True,
-                "dispatches": {
-                    "include": {
-                        "responder": True
-                    }
-                },
-                "transcripts": {
-                    "order_by": {
-                        "timestamp": "asc"
-                    }
-                }
-            }
+            include=include
         )
         
         if not session:
@@ -93,49 +169,143 @@ async def get_session(session_id: str):
         logger.error(f"Error retrieving session: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@apis.get("/session-stats")
-async def get_session_stats():
-    """Get statistics about sessions for dashboard display"""
+def _transcript_where(session_id: str, cursor: Optional[str], since: Optional[datetime]) -> Dict[str, Any]:
+    """Build the filter for transcript rows after the cursor or since time; raises 400 on a bad cursor"""
+    where: Dict[str, Any] = {"sessionId": session_id}
+    if cursor:
+        where = {"AND": [where, _keyset_after("timestamp", cursor, descending=False)]}
+    elif since:
+        where["timestamp"] = {"gt": since}
+    return where
+
+async def _fetch_transcript_page(where: Dict[str, Any], take: int):
+    """Fetch transcript rows matching the filter in (timestamp, id) order"""
+    return await prisma.transcript.find_many(
+        where=where,
+        order_by=[
+            {"timestamp": "asc"},
+            {"id": "asc"}
+        ],
+        take=take
+    )
+
+async def _stream_transcript_ndjson(session_id: str, where: Dict[str, Any], page_size: int):
+    """Stream every transcript row matching the validated filter as NDJSON, one page at a time"""
+    while True:
+        rows = await _fetch_transcript_page(where, page_size)
+        for row in rows:
+            yield json.dumps(jsonable_encoder(row.dict())) + "\n"
+        if len(rows) < page_size:
+            break
+        where = _transcript_where(session_id, _encode_cursor(rows[-1].timestamp, rows[-1].id), None)
+
+@apis.get("/sessions/{session_id}/transcripts")
+async def get_session_transcripts(
+    session_id: str,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only return entries after this time"),
+    limit: int = Query(TRANSCRIPT_PAGE_SIZE, ge=1, le=1000),
+    format: Literal["json", "ndjson"] = "json"
+):
+    """
+    Get transcript entries for a session in chronological order.
+    
+    In json mode one page is returned with a next_cursor; pass it back (or
+    since=) to tail new entries. In ndjson mode every remaining entry is
+    streamed, fetched from the database `limit` rows at a time.
+    """
     try:
-        # Get counts of sessions by status
-        status_counts = {}
-        for status in ["ACTIVE", "EMERGENCY_VERIFIED", "DISPATCHED", "COMPLETED", 
-                      "DROPPED", "TRANSFERRED", "NON_EMERGENCY"]:
-            count = await prisma.session.count(
-                where={"status": status}
+        # Validated before any response starts, so a bad cursor is a 400 and not a truncated stream
+        where = _transcript_where(session_id, cursor, since)
+        if format == "ndjson":
+            return StreamingResponse(
+                _stream_transcript_ndjson(session_id, where, limit),
+                media_type="application/x-ndjson"
             )
-            status_counts[status] = count
-        
 
-        type_counts = {}
-        for etype in ["MEDICAL", "POLICE", "FIRE", "OTHER"]:
-            count = await prisma.session.count(
-                where={"emergencyType": etype}
-            )
-            type_counts[etype] = count
-        
-       
-        total = await prisma.session.count()
-        
-     
-        day_ago = datetime.now() - timedelta(days=1)
-        recent = await prisma.session.count(
+        rows = await _fetch_transcript_page(where, limit + 1)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+        if rows:
+            # Always return a cursor so an idle dashboard can keep tailing
+            next_cursor = _encode_cursor(rows[-1].timestamp, rows[-1].id)
+        elif cursor:
+            next_cursor = cursor
+
+        return StreamingResponse(
+            _stream_json_page("transcripts", rows, next_cursor),
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving session transcripts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _compute_session_stats() -> Dict[str, Any]:
+    """Compute dashboard statistics with one grouped query and one count"""
+    day_ago = datetime.now() - timedelta(days=1)
+    groups, recent = await asyncio.gather(
+        prisma.session.group_by(
+            by=["status", "emergencyType"],
+            count={"_all": True}
+        ),
+        prisma.session.count(
             where={
                 "createdAt": {
                     "gte": day_ago
                 }
             }
         )
-        
+    )
+
+    status_counts = {status: 0 for status in SESSION_STATUSES}
+    type_counts = {etype: 0 for etype in EMERGENCY_TYPES}
+    total = 0
+    for group in groups:
+        count = group["_count"]["_all"]
+        total += count
+        if group.get("status") in status_counts:
+            status_counts[group["status"]] += count
+        if group.get("emergencyType") in type_counts:
+            type_counts[group["emergencyType"]] += count
+
+    return {
+        "total": total,
+        "recent_24h": recent,
+        "by_status": status_counts,
+        "by_type": type_counts
+    }
+
+async def _cached_session_stats() -> Dict[str, Any]:
+    """Return cached stats, letting concurrent callers share a single refresh"""
+    global _stats_inflight
+
+    if _stats_cache["value"] is not None and time.monotonic() < _stats_cache["expires"]:
+        return _stats_cache["value"]
+
+    if _stats_inflight is None:
+        _stats_inflight = asyncio.ensure_future(_compute_session_stats())
+        try:
+            value = await asyncio.shield(_stats_inflight)
+            _stats_cache["value"] = value
+            _stats_cache["expires"] = time.monotonic() + STATS_CACHE_TTL
+            return value
+        finally:
+            _stats_inflight = None
+
+    return await asyncio.shield(_stats_inflight)
+
+@apis.get("/session-stats")
+async def get_session_stats():
+    """Get statistics about sessions for dashboard display"""
+    try:
+        stats = await _cached_session_stats()
         return {
             "success": True,
-            "stats": {
-                "total": total,
-                "recent_24h": recent,
-                "by_status": status_counts,
-                "by_type": type_counts
-            }
+            "stats": stats
         }
     except Exception as e:
         logger.error(f"Error retrieving session statistics: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
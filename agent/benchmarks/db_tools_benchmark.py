@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the database calls made during a live interview:
+create_or_update_interview, update_interview_feedback and
+store_interview_transcript, plus the pydantic models they build.
+
+Every benchmark reports latency percentiles, and the database ones also
+report round trips per call (requests to the Prisma query engine, which
+includes transaction begin/commit) and execute_db_operation calls per
+call. Background data is seeded the same way as index_benchmark.py so
+queries run against realistic table sizes.
+
+The db_tools calls run with the shipped settings, so their latency is what
+a tool call or transcript entry sees in production (including the
+transcript flush interval). The raw writes underneath them are measured
+separately.
+
+Run from the agent directory against a disposable database:
+
+    python benchmarks/db_tools_benchmark.py --save-baseline bench.json
+    python benchmarks/db_tools_benchmark.py --baseline bench.json --threshold 0.2
+
+With --baseline the script exits with status 1 if any p50 is more than
+--threshold slower than the baseline, or any call needs more round trips.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import datetime
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import connect_db, disconnect_db, get_db_stats
+from tools.db_tools import (
+    create_or_update_interview,
+    update_interview_feedback,
+    store_interview_transcript,
+    get_transcript_writer,
+    close_transcript_writer
+)
+from tools.db_operations import create_interview_transcripts, update_interview
+from models.db_operations import InterviewInput, InterviewTranscriptInput
+from benchmarks.index_benchmark import SEED_POSITION, seed, cleanup
+
+logger = logging.getLogger("db-tools-benchmark")
+
+ANSWER = (
+    "In my last role I owned the billing service. We moved it from nightly batch jobs to an "
+    "event driven pipeline, which cut reconciliation time from hours to minutes, and I "
+    "mentored two junior developers through the migration."
+)
+
+
+class RoundTripCounter:
+    """
+    Count requests sent to the Prisma query engine.
+
+    Wraps methods of the private engine object (client._engine) as found in
+    prisma-client-py 0.9 to 0.15; methods missing in other versions are not
+    counted, so compare round trips only between runs on the same version.
+    """
+
+    METHODS = ("query", "start_transaction", "commit_transaction", "rollback_transaction")
+
+    def __init__(self, client):
+        self.count = 0
+        engine = client._engine
+        for name in self.METHODS:
+            method = getattr(engine, name, None)
+            if method is not None:
+                setattr(engine, name, self._counting(method))
+
+    def _counting(self, method):
+        async def counted(*args, **kwargs):
+            self.count += 1
+            return await method(*args, **kwargs)
+        return counted
+
+
+def summarize(name: str, samples: list, unit: str, round_trips: float = None, db_ops: float = None):
+    samples = sorted(samples)
+    return {
+        "name": name,
+        "unit": unit,
+        "p50": statistics.median(samples),
+        "p95": samples[max(int(len(samples) * 0.95) - 1, 0)],
+        "max": samples[-1],
+        "round_trips": round_trips,
+        "db_ops": db_ops,
+    }
+
+
+def bench_models(iterations: int):
+    """Construction and serialization cost of the pydantic inputs, in microseconds"""
+    interview_samples = []
+    transcript_samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        InterviewInput(
+            position="Software Engineer",
+            department="ENGINEERING",
+            level="MID",
+            feedback="Solid fundamentals",
+            overallScore=72,
+            status="ACTIVE"
+        ).dict(exclude_none=True)
+        interview_samples.append((time.perf_counter() - started) * 1e6)
+
+        started = time.perf_counter()
+        InterviewTranscriptInput(
+            id=str(uuid.uuid4()),
+            interviewId="00000000-0000-0000-0000-000000000000",
+            speakerType="CANDIDATE",
+            content=ANSWER
+        )
+        transcript_samples.append((time.perf_counter() - started) * 1e6)
+    return [
+        summarize("InterviewInput", interview_samples, "us"),
+        summarize("InterviewTranscriptInput", transcript_samples, "us"),
+    ]
+
+
+async def measure(name: str, fn, iterations: int, counter: RoundTripCounter):
+    samples = []
+    round_trips = 0
+    operations = 0
+    for i in range(iterations):
+        trips_before = counter.count
+        ops_before = get_db_stats()["operations"]
+        started = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+        round_trips += counter.count - trips_before
+        operations += get_db_stats()["operations"] - ops_before
+    return summarize(name, samples, "ms", round_trips / iterations, operations / iterations)
+
+
+async def bench_db_tools(counter: RoundTripCounter, iterations: int):
+    run_id = uuid.uuid4().hex[:8]
+    interview_ids = []
+
+    async def create_interview(i):
+        result = await create_or_update_interview(
+            position=SEED_POSITION,
+            department="ENGINEERING",
+            level="MID",
+            candidate_name=f"Bench Candidate {i}",
+            candidate_email=f"{run_id}-{i}@bench.invalid",
+            candidate_phone=f"+1555{run_id[:4]}{i:04d}",
+            candidate_experience="4 years backend development"
+        )
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        interview_ids.append(result["interview_id"])
+
+    async def update_existing(i):
+        # Same candidate again: fills empty fields only
+        await create_or_update_interview(
+            interview_id=interview_ids[i],
+            candidate_email=f"{run_id}-{i}@bench.invalid",
+            candidate_skills="Python, Go, PostgreSQL"
+        )
+
+    async def update_feedback(i):
+        await update_interview_feedback(
+            interview_ids[i],
+            feedback="Clear explanations, needs more depth on system design",
+            overall_score=random.randint(40, 90),
+            technical_skill_score=random.randint(40, 90),
+            communication_score=random.randint(40, 90)
+        )
+
+    async def store_transcript(i):
+        await store_interview_transcript(interview_ids[i], "CANDIDATE", ANSWER)
+
+    async def transcript_written(i):
+        # Queued, flushed after the writer's flush interval and written
+        await store_interview_transcript(interview_ids[i], "AGENT", ANSWER)
+        await get_transcript_writer()._queue.join()
+
+    async def raw_feedback_write(i):
+        await update_interview(interview_ids[i], {"overallScore": random.randint(40, 90)})
+
+    async def raw_transcript_write(i):
+        await create_interview_transcripts([InterviewTranscriptInput(
+            id=str(uuid.uuid4()),
+            interviewId=interview_ids[i],
+            speakerType="CANDIDATE",
+            content=ANSWER,
+            timestamp=datetime.datetime.now(datetime.timezone.utc)
+        )])
+
+    results = [
+        await measure("create_or_update_interview (create)", create_interview, iterations, counter),
+        await measure("create_or_update_interview (update)", update_existing, iterations, counter),
+        await measure("update_interview_feedback", update_feedback, iterations, counter),
+    ]
+    # Enqueue cost only; the writes land in the background
+    enqueue = await measure("store_interview_transcript (enqueue)", store_transcript, iterations, counter)
+    enqueue["round_trips"] = enqueue["db_ops"] = None
+    await get_transcript_writer()._queue.join()
+    results.append(enqueue)
+    results.append(await measure("store_interview_transcript (written)", transcript_written, iterations, counter))
+    await close_transcript_writer()
+    results.append(await measure("update_interview (raw write)", raw_feedback_write, iterations, counter))
+    results.append(await measure("create_interview_transcripts (raw write)", raw_transcript_write, iterations, counter))
+    return results
+
+
+def report(results):
+    print(f"\n{'benchmark':<44}{'p50':>10}{'p95':>10}{'max':>10}{'trips':>8}{'db ops':>8}")
+    for r in results:
+        trips = f"{r['round_trips']:.1f}" if r["round_trips"] is not None else "-"
+        ops = f"{r['db_ops']:.1f}" if r["db_ops"] is not None else "-"
+        print(
+            f"{r['name']:<44}{r['p50']:>8.2f}{r['unit']:>2}{r['p95']:>8.2f}{r['unit']:>2}"
+            f"{r['max']:>8.2f}{r['unit']:>2}{trips:>8}{ops:>8}"
+        )
+
+
+def compare(results, baseline: dict, threshold: float) -> list:
+    """Return a description of every regression against the baseline"""
+    regressions = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if base is None:
+            continue
+        if r["p50"] > base["p50"] * (1 + threshold):
+            regressions.append(
+                f"{r['name']}: p50 {r['p50']:.2f}{r['unit']} vs {base['p50']:.2f}{r['unit']} "
+                f"(+{(r['p50'] / base['p50'] - 1) * 100:.0f}%)"
+            )
+        if r["round_trips"] is not None and base.get("round_trips") is not None and r["round_trips"] > base["round_trips"]:
+            regressions.append(f"{r['name']}: {r['round_trips']:.1f} round trips vs {base['round_trips']:.1f}")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviews", type=int, default=2000, help="Background interviews to seed")
+    parser.add_argument("--transcripts", type=int, default=50, help="Transcript entries per seeded interview")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--model-iterations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a previously seeded dataset")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's results as JSON to this path")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative p50 slowdown")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded dataset when done")
+    args = parser.parse_args()
+
+    # index_benchmark configures INFO logging; per-call logs would swamp the report
+    logging.getLogger().setLevel(logging.WARNING)
+    random.seed(args.seed)
+
+    results = bench_models(args.model_iterations)
+    client = await connect_db()
+    try:
+        if not args.skip_seed:
+            await seed(client, args.interviews, args.transcripts)
+        await client.execute_raw('ANALYZE "Interview"')
+        await client.execute_raw('ANALYZE "InterviewTranscript"')
+        await client.execute_raw('ANALYZE "Candidate"')
+        results.extend(await bench_db_tools(RoundTripCounter(client), args.iterations))
+        if args.cleanup:
+            await cleanup(client)
+    finally:
+        await disconnect_db()
+
+    report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({r["name"]: r for r in results}, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
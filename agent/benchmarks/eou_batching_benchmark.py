@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Compare end-of-utterance decision latency with per-request inference vs. the
+micro-batched runner, under many concurrent interviews.
+
+Requests are issued from a thread pool, the same way the worker's inference
+process calls runners. Download the model first:
+
+    python agent.py download-files
+    python benchmarks/eou_batching_benchmark.py --sessions 32 --requests 50
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.plugins.turn_detector.eou import _EUORunner
+
+import pipeline.batched_eou as batched_eou
+
+UTTERANCES = [
+    "I have about five years of experience with Python and Go",
+    "Well, I think the main trade-off there is between consistency and",
+    "Could you repeat the question please",
+    "So first I would build a hash map of the values and then",
+    "Yes, I led the migration of our billing service to Kubernetes",
+    "Hmm, let me think about that for a second",
+]
+
+
+def make_request(turns: int) -> bytes:
+    chat_ctx = []
+    for n in range(turns):
+        role = "assistant" if n % 2 == 0 else "user"
+        chat_ctx.append({"role": role, "content": random.choice(UTTERANCES)})
+    chat_ctx[-1]["role"] = "user"
+    return json.dumps({"chat_ctx": chat_ctx}).encode()
+
+
+def run_load(runner, sessions: int, requests: int, think_ms: float):
+    """Each session sends `requests` predictions, pausing `think_ms` between them."""
+    def session(_):
+        samples = []
+        for _ in range(requests):
+            data = make_request(random.randint(1, 6))
+            started = time.perf_counter()
+            runner.run(data)
+            samples.append((time.perf_counter() - started) * 1000)
+            time.sleep(random.uniform(0, think_ms) / 1000)
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        samples = [s for result in pool.map(session, range(sessions)) for s in result]
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[max(int(len(samples) * 0.99) - 1, 0)],
+        "throughput": len(samples) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent interviews")
+    parser.add_argument("--requests", type=int, default=50, help="Predictions per interview")
+    parser.add_argument("--think-ms", type=float, default=50, help="Max pause between predictions")
+    parser.add_argument("--max-batch", type=int, default=batched_eou.EOU_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=batched_eou.EOU_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    batched_eou.EOU_MAX_BATCH = args.max_batch
+    batched_eou.EOU_MAX_WAIT_MS = args.max_wait_ms
+
+    single = _EUORunner()
+    single.initialize()
+    batched = batched_eou.BatchedEOURunner()
+    batched.initialize()
+
+    print(f"{args.sessions} sessions x {args.requests} predictions")
+    print(f"{'runner':<22}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name, runner in [("per-request", single), ("batched", batched)]:
+        result = run_load(runner, args.sessions, args.requests, args.think_ms)
+        print(f"{name:<22}{result['p50']:>10.2f}{result['p99']:>10.2f}{result['throughput']:>10.1f}")
+
+    batcher = batched._batcher
+    print(f"\naverage batch size: {batcher.items / max(batcher.batches, 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
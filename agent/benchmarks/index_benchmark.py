@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Seed a large synthetic interview dataset and measure the latency of the
+agent's hot queries, optionally with and without the hot-path indexes.
+
+Run from the agent directory against a disposable database:
+
+    python benchmarks/index_benchmark.py --interviews 5000 --transcripts 200 --compare
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import connect_db, disconnect_db
+from tools.db_operations import get_interview_transcripts
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("index-benchmark")
+
+SEED_POSITION = "bench-seed"
+STATUSES = ["ACTIVE", "COMPLETED", "CANCELLED", "PENDING_REVIEW"]
+SPEAKERS = ["AGENT", "CANDIDATE", "SYSTEM"]
+
+# Indexes added by the hot_path_indexes migration
+INDEXES = {
+    "Interview_status_createdAt_idx": 'CREATE INDEX IF NOT EXISTS "Interview_status_createdAt_idx" ON "Interview"("status", "createdAt")',
+    "Interview_createdAt_idx": 'CREATE INDEX IF NOT EXISTS "Interview_createdAt_idx" ON "Interview"("createdAt")',
+    "Interview_candidateId_idx": 'CREATE INDEX IF NOT EXISTS "Interview_candidateId_idx" ON "Interview"("candidateId")',
+    "InterviewTranscript_interviewId_timestamp_id_idx": 'CREATE INDEX IF NOT EXISTS "InterviewTranscript_interviewId_timestamp_id_idx" ON "InterviewTranscript"("interviewId", "timestamp", "id")',
+}
+
+
+async def seed(client, interviews: int, transcripts: int, chunk_size: int = 5000):
+    """Create synthetic candidates, interviews and transcript rows."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    candidate_ids = [str(uuid.uuid4()) for _ in range(max(interviews // 2, 1))]
+    for start in range(0, len(candidate_ids), chunk_size):
+        await client.candidate.create_many(data=[
+            {"id": cid, "email": f"{cid}@bench.invalid", "name": "Bench Candidate"}
+            for cid in candidate_ids[start:start + chunk_size]
+        ])
+
+    interview_ids = []
+    batch = []
+    for i in range(interviews):
+        interview_id = str(uuid.uuid4())
+        interview_ids.append(interview_id)
+        batch.append({
+            "id": interview_id,
+            "position": SEED_POSITION,
+            "status": random.choice(STATUSES),
+            "candidateId": random.choice(candidate_ids),
+            "createdAt": now - datetime.timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+        })
+        if len(batch) >= chunk_size:
+            await client.interview.create_many(data=batch)
+            batch = []
+    if batch:
+        await client.interview.create_many(data=batch)
+    logger.info(f"Seeded {interviews} interviews")
+
+    rows = []
+    written = 0
+    for interview_id in interview_ids:
+        started = now - datetime.timedelta(hours=random.randint(1, 24 * 90))
+        for n in range(transcripts):
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "interviewId": interview_id,
+                "speakerType": SPEAKERS[n % 2] if n else "SYSTEM",
+                "content": f"Synthetic utterance {n}",
+                "timestamp": started + datetime.timedelta(seconds=n * 5),
+            })
+            if len(rows) >= chunk_size:
+                await client.interviewtranscript.create_many(data=rows)
+                written += len(rows)
+                rows = []
+    if rows:
+        await client.interviewtranscript.create_many(data=rows)
+        written += len(rows)
+    logger.info(f"Seeded {written} transcript entries")
+
+
+async def cleanup(client):
+    """Delete everything created by seed()."""
+    interviews = await client.interview.find_many(where={"position": SEED_POSITION})
+    ids = [i.id for i in interviews]
+    candidate_ids = list({i.candidateId for i in interviews if i.candidateId})
+    await client.interviewtranscript.delete_many(where={"interviewId": {"in": ids}})
+    await client.interview.delete_many(where={"id": {"in": ids}})
+    await client.candidate.delete_many(where={"id": {"in": candidate_ids}})
+    logger.info(f"Removed {len(ids)} seeded interviews")
+
+
+async def measure(name: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "query": name,
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+        "p99": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+async def run_queries(client, iterations: int):
+    """Time the queries issued by tools/db_operations.py and api/service.py."""
+    interviews = await client.interview.find_many(where={"position": SEED_POSITION}, take=200)
+    if not interviews:
+        raise SystemExit("No seeded interviews found; run without --skip-seed first")
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=45)
+
+    async def transcript_page():
+        await get_interview_transcripts(random.choice(interviews).id, limit=200)
+
+    async def transcript_tail():
+        await get_interview_transcripts(random.choice(interviews).id, since=since, limit=200)
+
+    async def interviews_by_status():
+        await client.interview.find_many(
+            where={"status": random.choice(STATUSES)},
+            order_by={"createdAt": "desc"},
+            take=50
+        )
+
+    async def interviews_by_candidate():
+        await client.interview.find_many(where={"candidateId": random.choice(interviews).candidateId})
+
+    results = []
+    for name, fn in [
+        ("transcript page", transcript_page),
+        ("transcript since", transcript_tail),
+        ("interviews by status", interviews_by_status),
+        ("interviews by candidate", interviews_by_candidate),
+    ]:
+        results.append(await measure(name, fn, iterations))
+    return results
+
+
+def report(label: str, results):
+    print(f"\n{label}")
+    print(f"{'query':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['query']:<26}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['p99']:>10.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviews", type=int, default=2000)
+    parser.add_argument("--transcripts", type=int, default=200, help="Transcript entries per interview")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a previously seeded dataset")
+    parser.add_argument("--compare", action="store_true", help="Also measure with the hot-path indexes dropped")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded dataset when done")
+    args = parser.parse_args()
+
+    client = await connect_db()
+    try:
+        if not args.skip_seed:
+            await seed(client, args.interviews, args.transcripts)
+        await client.execute_raw('ANALYZE "Interview"')
+        await client.execute_raw('ANALYZE "InterviewTranscript"')
+
+        if args.compare:
+            for name in INDEXES:
+                await client.execute_raw(f'DROP INDEX IF EXISTS "{name}"')
+            report("Without hot-path indexes", await run_queries(client, args.iterations))
+            for statement in INDEXES.values():
+                await client.execute_raw(statement)
+            await client.execute_raw('ANALYZE "Interview"')
+            await client.execute_raw('ANALYZE "InterviewTranscript"')
+
+        report("With hot-path indexes", await run_queries(client, args.iterations))
+
+        if args.cleanup:
+            await cleanup(client)
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Drive N simultaneous synthetic interviews through agent.entrypoint, each
+in its own process as the LiveKit worker runs jobs, and report how they
+hold up.
+
+The LiveKit room and the voice pipeline are replaced by a scripted agent
+that plays a fixed conversation: the candidate speaks, the fake STT and
+turn detector take their configured time, the fake LLM answers (calling
+the interview tools on scripted turns) and the fake TTS starts speaking.
+Everything behind the tools is the real code: database writes go to the
+Postgres in DATABASE_URL and real-time events to a local Socket.IO server
+started by this script. The same seed always plays the same interviews.
+
+Run from the agent directory against a disposable database:
+
+    python benchmarks/load_test.py --sessions 50 --turns 12
+
+Reported: per-turn response latency percentiles (end of candidate speech
+to agent audio), database operations per second, transcript entries
+written, dropped and failed, event-loop lag and RSS per session process.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger("load-test")
+
+CANDIDATE_LINES = [
+    "I have been working as a backend developer for about four years, mostly with Python and Go.",
+    "In my last project I split a monolith into services and moved the team to event driven messaging.",
+    "I would start by profiling the slow endpoint and checking the query plans before touching the code.",
+    "A hash map gives constant time lookups on average, but you pay for it in memory and ordering.",
+    "We used feature flags and canary releases so we could roll back without a full deployment.",
+    "I usually write the tests first for anything with tricky edge cases, like date handling.",
+    "When we disagreed on the design we wrote down the trade-offs and let the data decide.",
+    "I am interested in Zoho because the products are built in house end to end.",
+]
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak rather than current where /proc is not available
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_socket_server(port: int, events):
+    """Minimal stand-in for the backend's Socket.IO server, run in its own process"""
+    import socketio
+    from aiohttp import web
+
+    sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
+    app = web.Application()
+    sio.attach(app)
+
+    @sio.on("*")
+    async def any_event(event, sid, data=None):
+        with events.get_lock():
+            events.value += 1
+
+    @sio.on("join-interview")
+    async def join_interview(sid, interview_id):
+        await sio.enter_room(sid, interview_id)
+        with events.get_lock():
+            events.value += 1
+
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+class FakeLLMStream:
+    """Async stream of chat chunks with a scripted time to first token"""
+
+    def __init__(self, text: str, ttft: float, duration: float):
+        self._text = text
+        self._ttft = ttft
+        self._duration = duration
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        from livekit.agents import llm
+
+        words = self._text.split()
+        await asyncio.sleep(self._ttft)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(max(self._duration - self._ttft, 0) / len(words))
+            yield llm.ChatChunk(
+                request_id="fake",
+                choices=[llm.Choice(delta=llm.ChoiceDelta(role="assistant", content=f"{word} "))]
+            )
+
+    async def aclose(self):
+        return None
+
+
+class FakeLLM:
+    """Stands in for google.LLM; also used by the chat context summarizer"""
+
+    def __init__(self, ttft: float, duration: float):
+        self.ttft = ttft
+        self.duration = duration
+
+    def chat(self, *, chat_ctx, fnc_ctx=None, **kwargs):
+        return FakeLLMStream("Noted. Could you tell me more about how you approached that?", self.ttft, self.duration)
+
+
+class FakeTurnDetector:
+    """Stands in for turn_detector.EOUModel with a fixed inference time"""
+
+    def __init__(self, inference: float):
+        self._inference = inference
+
+    def unlikely_threshold(self) -> float:
+        return 0.0289
+
+    def supports_language(self, language) -> bool:
+        return True
+
+    async def predict_end_of_turn(self, chat_ctx, *, timeout=3) -> float:
+        await asyncio.sleep(self._inference)
+        return 0.9
+
+
+class FakeTTS:
+    """Nothing to prefill; synthesis time is played by the scripted agent"""
+
+    async def prefill(self):
+        return None
+
+
+class ScriptedPipelineAgent:
+    """
+    Plays a scripted interview with the same events, callbacks and metrics
+    as VoicePipelineAgent, so the entrypoint's handlers run unchanged.
+    """
+
+    # Filled in by main() before any session starts
+    config = None
+    instances = []
+    turn_latencies = []
+
+    def __init__(self, *, vad=None, stt=None, llm=None, tts=None, turn_detector=None,
+                 chat_ctx=None, fnc_ctx=None, min_endpointing_delay=0.5, max_endpointing_delay=6.0,
+                 before_llm_cb=None, **kwargs):
+        from livekit.agents import llm as lk_llm, utils
+
+        self._emitter = utils.EventEmitter()
+        self._llm = llm
+        self._turn_detector = turn_detector
+        self._chat_ctx = chat_ctx or lk_llm.ChatContext()
+        self._fnc_ctx = fnc_ctx
+        self._before_llm_cb = before_llm_cb
+        self._opts = SimpleNamespace(min_endpointing_delay=min_endpointing_delay, max_endpointing_delay=max_endpointing_delay)
+        self._deferred_validation = SimpleNamespace(
+            _end_of_speech_delay=min_endpointing_delay,
+            _max_endpointing_delay=max_endpointing_delay,
+            _turn_detector=turn_detector
+        )
+        self._greeted = asyncio.Event()
+        self.room_name = None
+        self.task = None
+        ScriptedPipelineAgent.instances.append(self)
+
+    def on(self, event, callback=None):
+        return self._emitter.on(event, callback)
+
+    def emit(self, event, *args):
+        self._emitter.emit(event, *args)
+
+    @property
+    def chat_ctx(self):
+        return self._chat_ctx
+
+    @property
+    def llm(self):
+        return self._llm
+
+    @property
+    def fnc_ctx(self):
+        return self._fnc_ctx
+
+    def start(self, room, participant=None):
+        self.room_name = room.name
+        self.task = asyncio.create_task(self._play(room.name))
+
+    async def say(self, text, allow_interruptions=True):
+        from livekit.agents import llm
+
+        await asyncio.sleep(self.config.tts_ttfb)
+        self.emit("agent_started_speaking")
+        await asyncio.sleep(self.config.agent_speech)
+        self.emit("agent_speech_committed", llm.ChatMessage.create(role="assistant", text=text))
+        self.emit("agent_stopped_speaking")
+        self._greeted.set()
+
+    async def _call_tool(self, name, **arguments):
+        function = self._fnc_ctx.ai_functions[name]
+        return await function.callable(**arguments)
+
+    async def _play(self, room_name: str):
+        from livekit.agents import llm, metrics
+
+        cfg = self.config
+        rng = random.Random(f"{cfg.seed}:{room_name}")
+
+        def jitter(value):
+            return value * rng.uniform(1 - cfg.jitter, 1 + cfg.jitter)
+
+        await self._greeted.wait()
+        for turn in range(cfg.turns):
+            sequence_id = f"{room_name}-{turn}"
+            text = rng.choice(CANDIDATE_LINES)
+
+            self.emit("user_started_speaking")
+            await asyncio.sleep(jitter(cfg.speech))
+            if rng.random() < 0.3:
+                # Thinking pause in the middle of the answer
+                self.emit("user_stopped_speaking")
+                await asyncio.sleep(jitter(0.6))
+                self.emit("user_started_speaking")
+                await asyncio.sleep(jitter(cfg.speech / 2))
+            self.emit("user_stopped_speaking")
+            speech_ended_at = time.perf_counter()
+
+            stt_delay = jitter(cfg.stt_delay)
+            await asyncio.sleep(stt_delay)
+            await self._turn_detector.predict_end_of_turn(self._chat_ctx)
+            remaining = self._opts.min_endpointing_delay - (time.perf_counter() - speech_ended_at)
+            await asyncio.sleep(max(remaining, 0))
+            self.emit("metrics_collected", metrics.PipelineEOUMetrics(
+                sequence_id=sequence_id,
+                timestamp=time.time(),
+                end_of_utterance_delay=time.perf_counter() - speech_ended_at,
+                transcription_delay=stt_delay
+            ))
+
+            user_msg = llm.ChatMessage.create(role="user", text=text)
+            request_ctx = self._chat_ctx.copy()
+            request_ctx.messages.append(user_msg)
+            if self._before_llm_cb is not None:
+                self._before_llm_cb(self, request_ctx)
+
+            llm_started_at = time.perf_counter()
+            reply = []
+            ttft = None
+            async with self._llm.chat(chat_ctx=request_ctx, fnc_ctx=self._fnc_ctx) as stream:
+                async for chunk in stream:
+                    if ttft is None:
+                        ttft = time.perf_counter() - llm_started_at
+                    reply.append(chunk.choices[0].delta.content)
+            prompt_tokens = sum(len(str(m.content or "")) for m in request_ctx.messages) // 4
+            self.emit("metrics_collected", metrics.PipelineLLMMetrics(
+                request_id=sequence_id, timestamp=time.time(), ttft=ttft or 0.0,
+                duration=time.perf_counter() - llm_started_at, label="fake", cancelled=False,
+                completion_tokens=len(reply), prompt_tokens=prompt_tokens,
+                total_tokens=prompt_tokens + len(reply), tokens_per_second=0.0, error=None,
+                sequence_id=sequence_id
+            ))
+
+            # Tool calls the real LLM would make at these points
+            if turn == 0:
+                await self._call_tool(
+                    "create_interview_session",
+                    position="Software Engineer", department="ENGINEERING", level="MID",
+                    candidate_name=f"Candidate {room_name}", candidate_email=f"{room_name}@load.invalid"
+                )
+            elif turn % 3 == 0:
+                await self._call_tool(
+                    "update_feedback",
+                    feedback=f"Progress after {turn} turns", overall_score=rng.randint(40, 90),
+                    technical_skill_score=rng.randint(40, 90), communication_score=rng.randint(40, 90)
+                )
+
+            tts_ttfb = jitter(cfg.tts_ttfb)
+            await asyncio.sleep(tts_ttfb)
+            self.emit("metrics_collected", metrics.PipelineTTSMetrics(
+                request_id=sequence_id, timestamp=time.time(), ttfb=tts_ttfb, duration=tts_ttfb,
+                audio_duration=cfg.agent_speech, cancelled=False, characters_count=len("".join(reply)),
+                label="fake", streamed=False, error=None, sequence_id=sequence_id
+            ))
+            self.emit("agent_started_speaking")
+            ScriptedPipelineAgent.turn_latencies.append(time.perf_counter() - speech_ended_at)
+
+            self._chat_ctx.messages.append(user_msg)
+            self.emit("user_speech_committed", user_msg)
+            await asyncio.sleep(jitter(cfg.agent_speech))
+            agent_msg = llm.ChatMessage.create(role="assistant", text="".join(reply).strip())
+            self._chat_ctx.messages.append(agent_msg)
+            self.emit("agent_speech_committed", agent_msg)
+            self.emit("agent_stopped_speaking")
+
+        await self._call_tool("update_feedback", feedback="Load test interview finished", status="PENDING_REVIEW")
+
+
+class FakeJobContext:
+    """The parts of JobContext used by entrypoint"""
+
+    def __init__(self, index: int, userdata: dict):
+        self.room = SimpleNamespace(name=f"load-{index}")
+        self.proc = SimpleNamespace(userdata=userdata)
+        self._index = index
+        self._shutdown_callbacks = []
+
+    def add_shutdown_callback(self, callback):
+        self._shutdown_callbacks.append(callback)
+
+    async def connect(self, auto_subscribe=None):
+        await asyncio.sleep(0)
+
+    async def wait_for_participant(self):
+        return SimpleNamespace(identity=f"candidate-{self._index}")
+
+    async def shutdown(self):
+        # LiveKit runs the callbacks concurrently
+        results = await asyncio.gather(*(callback() for callback in self._shutdown_callbacks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Shutdown callback failed for {self.room.name}: {result}")
+
+
+async def monitor_loop(interval: float, lags: list, rss: list, stop: asyncio.Event):
+    """Sample event-loop lag (how late a sleep wakes up) and RSS"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - expected, 0.0))
+        rss.append(_rss_mb())
+
+
+async def run_session(index: int, args) -> dict:
+    """Play one interview in this process, the way a job process runs it"""
+    import agent as agent_module
+    from utils import get_db_stats, disconnect_db
+    from tools.db_tools import get_transcript_writer
+
+    agent_module.VoicePipelineAgent = ScriptedPipelineAgent
+    agent_module.turn_detector = SimpleNamespace(EOUModel=lambda: FakeTurnDetector(args.eou_inference))
+    ScriptedPipelineAgent.config = args
+
+    userdata = {
+        "vad": None,
+        "stt": None,
+        "llm": FakeLLM(args.llm_ttft, args.llm_duration),
+        "tts": FakeTTS(),
+    }
+
+    lags, rss = [], []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop(0.05, lags, rss, stop))
+    baseline_rss = _rss_mb()
+
+    ctx = FakeJobContext(index, userdata)
+    error = None
+    try:
+        await agent_module.entrypoint(ctx)
+        scripted = next(a for a in ScriptedPipelineAgent.instances if a.room_name == ctx.room.name)
+        await scripted.task
+    except Exception as e:
+        error = repr(e)
+    finally:
+        # Closing the writer releases it, so keep it to read its counts
+        writer = get_transcript_writer()
+        await ctx.shutdown()
+    stop.set()
+    await monitor
+
+    db = get_db_stats()
+    await disconnect_db()
+    return {
+        "error": error,
+        "latencies": ScriptedPipelineAgent.turn_latencies,
+        "lags": lags,
+        "rss_baseline_mb": baseline_rss,
+        "rss_peak_mb": max(rss) if rss else _rss_mb(),
+        "db_ops": db["operations"],
+        "db_errors": db["errors"],
+        "db_max_wait_ms": db.get("max_wait_ms", 0.0),
+        "transcripts_written": writer.written,
+        "transcripts_dropped": writer.dropped,
+        "transcripts_failed": writer.failed,
+    }
+
+
+def session_process(index: int, args, results):
+    """Process target: play one session and put its measurements on the queue"""
+    logging.basicConfig(level=args.log_level)
+    try:
+        result = asyncio.run(run_session(index, args))
+    except BaseException as e:
+        result = {"error": repr(e)}
+    results.put(result)
+
+
+def run(args, socket_events) -> dict:
+    # One process per session, as the LiveKit worker runs jobs; anything
+    # process-wide (transcript writer, loop monitor, timings) then belongs
+    # to a single interview like in production
+    mp = multiprocessing.get_context("spawn")
+    results = mp.Queue()
+    processes = []
+    started_at = time.perf_counter()
+    for index in range(args.sessions):
+        process = mp.Process(target=session_process, args=(index, args, results), name=f"load-{index}")
+        process.start()
+        processes.append(process)
+        time.sleep(args.ramp)
+
+    sessions = []
+    while len(sessions) < len(processes):
+        try:
+            sessions.append(results.get(timeout=1.0))
+        except queue.Empty:
+            if not any(p.is_alive() for p in processes) and results.empty():
+                break
+    elapsed = time.perf_counter() - started_at
+    for process in processes:
+        process.join()
+
+    finished = [s for s in sessions if s["error"] is None]
+    failures = [s["error"] for s in sessions if s["error"] is not None]
+    for failure in failures[:5]:
+        logger.error(f"Session failed: {failure}")
+
+    latencies_ms = [l * 1000 for s in finished for l in s["latencies"]]
+    lags_ms = [l * 1000 for s in finished for l in s["lags"]]
+    db_ops = sum(s["db_ops"] for s in finished)
+    rss_per_session = [s["rss_peak_mb"] - s["rss_baseline_mb"] for s in finished]
+    return {
+        "sessions": args.sessions,
+        "failed": args.sessions - len(finished),
+        "turns": len(latencies_ms),
+        "elapsed_s": elapsed,
+        "latency_p50": _percentile(latencies_ms, 0.50),
+        "latency_p95": _percentile(latencies_ms, 0.95),
+        "latency_p99": _percentile(latencies_ms, 0.99),
+        "db_ops": db_ops,
+        "db_ops_per_s": db_ops / elapsed,
+        "db_errors": sum(s["db_errors"] for s in finished),
+        "db_max_wait_ms": max((s["db_max_wait_ms"] for s in finished), default=0.0),
+        "transcripts_written": sum(s["transcripts_written"] for s in finished),
+        "transcripts_dropped": sum(s["transcripts_dropped"] for s in finished),
+        "transcripts_failed": sum(s["transcripts_failed"] for s in finished),
+        "socket_events": socket_events.value,
+        "lag_p50": _percentile(lags_ms, 0.50),
+        "lag_p99": _percentile(lags_ms, 0.99),
+        "lag_max": max(lags_ms) if lags_ms else 0.0,
+        "rss_process_peak_mb": max((s["rss_peak_mb"] for s in finished), default=0.0),
+        "rss_per_session_mb": sum(rss_per_session) / len(rss_per_session) if rss_per_session else 0.0,
+    }
+
+
+def report(r: dict):
+    print(f"\n{r['sessions']} sessions ({r['failed']} failed), {r['turns']} turns in {r['elapsed_s']:.1f}s")
+    print(f"{'response latency ms':<24}p50 {r['latency_p50']:>8.1f}   p95 {r['latency_p95']:>8.1f}   p99 {r['latency_p99']:>8.1f}")
+    print(f"{'event-loop lag ms':<24}p50 {r['lag_p50']:>8.1f}   p99 {r['lag_p99']:>8.1f}   max {r['lag_max']:>8.1f}")
+    print(f"{'database':<24}{r['db_ops']} ops, {r['db_ops_per_s']:.1f} ops/s, {r['db_errors']} errors, max wait {r['db_max_wait_ms']:.1f}ms")
+    print(
+        f"{'transcript entries':<24}{r['transcripts_written']} written, "
+        f"{r['transcripts_dropped']} dropped, {r['transcripts_failed']} failed"
+    )
+    print(f"{'socket events received':<24}{r['socket_events']}")
+    print(f"{'RSS MB':<24}per session {r['rss_per_session_mb']:.2f}   largest process {r['rss_process_peak_mb']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10, help="Candidate turns per interview")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ramp", type=float, default=0.05, help="Seconds between session starts")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative spread of every scripted duration")
+    parser.add_argument("--speech", type=float, default=2.0, help="Candidate speaking time per turn (s)")
+    parser.add_argument("--agent-speech", type=float, default=3.0, help="Agent speaking time per turn (s)")
+    parser.add_argument("--stt-delay", type=float, default=0.15, help="Final transcript delay (s)")
+    parser.add_argument("--eou-inference", type=float, default=0.02, help="Turn detector inference time (s)")
+    parser.add_argument("--llm-ttft", type=float, default=0.4, help="LLM time to first token (s)")
+    parser.add_argument("--llm-duration", type=float, default=0.8, help="LLM total generation time (s)")
+    parser.add_argument("--tts-ttfb", type=float, default=0.2, help="TTS time to first byte (s)")
+    parser.add_argument("--socket-port", type=int, default=4900)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    logger.setLevel(logging.INFO)
+    if not os.environ.get("DATABASE_URL"):
+        raise SystemExit("Set DATABASE_URL to a disposable Postgres database")
+
+    # Read by the agent modules at import time
+    os.environ["WEBSOCKET_URL"] = f"http://127.0.0.1:{args.socket_port}"
+    os.environ["SPECULATIVE_LLM"] = "0"
+    os.environ.pop("METRICS_PORT", None)
+
+    socket_events = multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(target=run_socket_server, args=(args.socket_port, socket_events), daemon=True)
+    server.start()
+    time.sleep(1.0)
+    try:
+        report(run(args, socket_events))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
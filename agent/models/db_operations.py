@@ -67,6 +67,7 @@ class InterviewInput(BaseModel):
     recommendationNotes: Optional[str] = Field(default=None, description="Recommendations for next steps")
 
 class InterviewTranscriptInput(BaseModel):
+    id: Optional[str] = None
     interviewId: str
     speakerType: SpeakerType
     content: str
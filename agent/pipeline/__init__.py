@@ -0,0 +1,40 @@
+import logging
+
+from .context import ChatContextWindow
+from .endpointing import AdaptiveEndpointing
+from .latency import TurnLatencyTracer
+from .tts_cache import CachedTTS, PhraseCache
+
+logger = logging.getLogger(__name__)
+
+
+def enable_batched_eou() -> bool:
+    """
+    Serve end-of-utterance inference with BatchedEOURunner.
+
+    Must be called on the main thread before the worker starts, so the
+    inference process is created with this runner. EOUModel in each job is
+    unchanged; it calls the same inference method. The runner builds on
+    private parts of the turn-detector plugin, so it is imported only here;
+    if the installed plugin lacks them the stock runner is kept.
+
+    Returns:
+        True if the batched runner was registered
+    """
+    try:
+        from .batched_eou import register_batched_eou
+    except ImportError as e:
+        logger.warning(f"Batched EOU inference unavailable with this turn-detector plugin, using the stock runner: {e}")
+        return False
+    register_batched_eou()
+    return True
+
+
+__all__ = [
+    "enable_batched_eou",
+    "ChatContextWindow",
+    "AdaptiveEndpointing",
+    "TurnLatencyTracer",
+    "CachedTTS",
+    "PhraseCache",
+]
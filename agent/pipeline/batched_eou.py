@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from livekit.agents.inference_runner import _InferenceRunner
+from livekit.plugins.turn_detector.eou import _EUORunner, MAX_HISTORY_TOKENS
+
+logger = logging.getLogger("batched-eou")
+
+# Micro-batching settings for end-of-utterance inference
+EOU_MAX_BATCH = int(os.environ.get("EOU_MAX_BATCH", "16"))
+EOU_MAX_WAIT_MS = float(os.environ.get("EOU_MAX_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """
+    Collect items submitted from many threads and process them in batches.
+
+    A batch is handed to `process` as soon as it holds `max_batch` items or
+    `max_wait` seconds have passed since its first item arrived. Callers
+    block until their own result is ready.
+    """
+
+    def __init__(self, process: Callable[[List[Any]], List[Any]], max_batch: int, max_wait: float):
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="eou-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any) -> Any:
+        slot = {"item": item, "done": threading.Event(), "result": None, "error": None}
+        self._queue.put(slot)
+        slot["done"].wait()
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["result"]
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.process([slot["item"] for slot in batch])
+                for slot, result in zip(batch, results):
+                    slot["result"] = result
+            except Exception as e:
+                for slot in batch:
+                    slot["error"] = e
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                for slot in batch:
+                    slot["done"].set()
+
+
+class BatchedEOURunner(_EUORunner):
+    """
+    End-of-utterance runner that micro-batches requests from all jobs.
+
+    The inference process serves every interview on the worker and runs
+    requests on a thread pool; instead of one ONNX call per request, this
+    runner groups requests arriving within EOU_MAX_WAIT_MS into one call.
+    If the model accepts an attention mask, sequences are left-padded into
+    a single batch. Otherwise only sequences of equal length are stacked,
+    so results are identical to per-request inference.
+    """
+
+    INFERENCE_METHOD = _EUORunner.INFERENCE_METHOD
+
+    def initialize(self) -> None:
+        super().initialize()
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._pad_id = self._tokenizer.pad_token_id or 0
+        self._batcher = MicroBatcher(self._run_batch, EOU_MAX_BATCH, EOU_MAX_WAIT_MS / 1000)
+        logger.info(
+            f"Batched EOU runner ready (max_batch={EOU_MAX_BATCH}, max_wait={EOU_MAX_WAIT_MS}ms, "
+            f"padded={'attention_mask' in self._input_names})"
+        )
+
+    def _run_batch(self, sequences: List[Any]) -> List[float]:
+        import numpy as np
+
+        if "attention_mask" in self._input_names:
+            width = max(len(seq) for seq in sequences)
+            input_ids = np.full((len(sequences), width), self._pad_id, dtype="int64")
+            mask = np.zeros((len(sequences), width), dtype="int64")
+            for row, seq in enumerate(sequences):
+                input_ids[row, width - len(seq):] = seq
+                mask[row, width - len(seq):] = 1
+            feeds = {"input_ids": input_ids, "attention_mask": mask}
+            if "position_ids" in self._input_names:
+                feeds["position_ids"] = np.clip(mask.cumsum(axis=1) - 1, 0, None)
+            outputs = self._session.run(None, feeds)
+            return [float(np.asarray(outputs[0][row]).reshape(-1)[-1]) for row in range(len(sequences))]
+
+        # Without a mask, padding would change the prediction: stack only equal lengths
+        results: List[Optional[float]] = [None] * len(sequences)
+        by_length = {}
+        for index, seq in enumerate(sequences):
+            by_length.setdefault(len(seq), []).append(index)
+        for indices in by_length.values():
+            input_ids = np.stack([sequences[i] for i in indices]).astype("int64")
+            outputs = self._session.run(None, {"input_ids": input_ids})
+            for row, index in enumerate(indices):
+                results[index] = float(np.asarray(outputs[0][row]).reshape(-1)[-1])
+        return results
+
+    def run(self, data: bytes) -> bytes | None:
+        data_json = json.loads(data)
+        chat_ctx = data_json.get("chat_ctx", None)
+
+        if not chat_ctx:
+            raise ValueError("chat_ctx is required on the inference input data")
+
+        start_time = time.perf_counter()
+
+        text = self._format_chat_ctx(chat_ctx)
+        inputs = self._tokenizer(
+            text,
+            add_special_tokens=False,
+            return_tensors="np",
+            max_length=MAX_HISTORY_TOKENS,
+            truncation=True,
+        )
+        eou_probability = self._batcher.submit(inputs["input_ids"][0])
+        end_time = time.perf_counter()
+
+        return json.dumps({
+            "eou_probability": eou_probability,
+            "input": text,
+            "duration": round(end_time - start_time, 3),
+        }).encode()
+
+
+def register_batched_eou():
+    """Replace the turn detector's inference runner with BatchedEOURunner."""
+    _InferenceRunner.registered_runners[_EUORunner.INFERENCE_METHOD] = BatchedEOURunner
+    logger.info("Using batched end-of-utterance inference")
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from livekit.agents import llm, metrics
+from livekit.agents.pipeline import VoicePipelineAgent
+from livekit.agents.pipeline.pipeline_agent import SpeechDataContextVar
+
+from utils.runtime_monitor import spawn
+
+logger = logging.getLogger("chat-context")
+
+# Candidate turns kept verbatim after the system prompt
+CONTEXT_RECENT_TURNS = int(os.environ.get("CONTEXT_RECENT_TURNS", "8"))
+# Older turns are summarized in batches of at least this many
+CONTEXT_SUMMARY_BATCH = int(os.environ.get("CONTEXT_SUMMARY_BATCH", "4"))
+
+# Rough token estimate; good enough to compare context sizes between turns
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = (
+    "You maintain the running notes of a technical job interview. Merge the "
+    "existing notes with the new part of the conversation into updated notes. "
+    "Keep every fact about the candidate (name, contact details, experience, "
+    "education, skills), the position, each question asked with the gist and "
+    "quality of the answer, any scores or feedback already recorded, and what "
+    "the interviewer planned to ask next. Write compact bullet points, no preamble."
+)
+
+
+def _text(message: llm.ChatMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(part for part in content if isinstance(part, str))
+    text = content or ""
+    if message.tool_calls:
+        calls = ", ".join(f"{call.function_info.name}({call.raw_arguments})" for call in message.tool_calls)
+        text = f"{text} [called {calls}]".strip()
+    return text
+
+
+def estimate_tokens(messages: List[llm.ChatMessage]) -> int:
+    return sum(len(_text(message)) for message in messages) // CHARS_PER_TOKEN
+
+
+class ChatContextWindow:
+    """
+    Keep the LLM context bounded for the whole interview.
+
+    Every LLM request gets the system prompt, a summary of the earlier
+    conversation and the last CONTEXT_RECENT_TURNS candidate turns verbatim
+    (a turn starts at a candidate message and includes the replies and tool
+    calls that followed it). Turns that fall out of the window are folded
+    into the summary by a background LLM call, so the request that pushed
+    them out is never delayed; until the summary covers them they are still
+    sent verbatim. Summarized turns are also dropped from the agent's own
+    chat context.
+
+    Install with `before_llm_cb=window.before_llm_cb`.
+    """
+
+    def __init__(self, recent_turns: int = CONTEXT_RECENT_TURNS, summary_batch: int = CONTEXT_SUMMARY_BATCH):
+        self.recent_turns = recent_turns
+        self.summary_batch = summary_batch
+        self.summary = ""
+        self.summaries = 0
+        self._summarized: Set[str] = set()
+        self._summary_task: Optional[asyncio.Task] = None
+        # Estimated context tokens sent per request, and tokens reported by the LLM
+        self.sent_tokens: List[int] = []
+        self.prompt_tokens: List[int] = []
+
+    def before_llm_cb(self, agent: VoicePipelineAgent, chat_ctx: llm.ChatContext):
+        """Trim the request context in place; VoicePipelineAgent then calls the LLM with it"""
+        messages = chat_ctx.messages
+        head = 0
+        while head < len(messages) and messages[head].role == "system":
+            head += 1
+
+        user_positions = [i for i in range(head, len(messages)) if messages[i].role == "user"]
+        cut = user_positions[-self.recent_turns] if len(user_positions) >= self.recent_turns else head
+        older = [m for m in messages[head:cut] if m.id not in self._summarized]
+
+        if older and self._summary_task is None:
+            turns = sum(1 for m in older if m.role == "user")
+            if turns >= self.summary_batch:
+                self._summary_task = spawn(self._summarize(agent, older), "context_summary")
+
+        trimmed = messages[:head]
+        if self.summary:
+            trimmed.append(llm.ChatMessage.create(
+                role="system",
+                text=f"Notes on the interview so far:\n{self.summary}"
+            ))
+        trimmed.extend(older)
+        trimmed.extend(messages[cut:])
+
+        full_tokens = estimate_tokens(messages)
+        sent_tokens = estimate_tokens(trimmed)
+        self.sent_tokens.append(sent_tokens)
+        logger.debug(
+            f"LLM context: {len(trimmed)}/{len(messages)} messages, ~{sent_tokens}/{full_tokens} tokens",
+            extra={"context_tokens": sent_tokens, "full_context_tokens": full_tokens}
+        )
+        chat_ctx.messages[:] = trimmed
+        return None
+
+    async def _summarize(self, agent: VoicePipelineAgent, messages: List[llm.ChatMessage]):
+        # Not part of any reply, so keep its LLM metrics out of the turn metrics
+        SpeechDataContextVar.set(None)
+        try:
+            conversation = "\n".join(
+                f"{message.role}: {_text(message)}" for message in messages if _text(message)
+            )
+            summary_ctx = llm.ChatContext().append(role="system", text=SUMMARY_PROMPT)
+            summary_ctx.append(
+                role="user",
+                text=f"Existing notes:\n{self.summary or '(none)'}\n\nNew conversation:\n{conversation}"
+            )
+            parts = []
+            async with agent.llm.chat(chat_ctx=summary_ctx) as stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            summary = "".join(parts).strip()
+            if not summary:
+                return
+
+            self.summary = summary
+            self.summaries += 1
+            folded = {message.id for message in messages}
+            self._summarized.update(folded)
+            # The agent's own history no longer needs the summarized turns
+            agent.chat_ctx.messages[:] = [m for m in agent.chat_ctx.messages if m.id not in folded]
+            logger.info(
+                f"Summarized {len(messages)} messages into ~{len(summary) // CHARS_PER_TOKEN} tokens",
+                extra={"summary_tokens": len(summary) // CHARS_PER_TOKEN}
+            )
+        except Exception as e:
+            logger.warning(f"Could not summarize chat context, keeping turns verbatim: {e}")
+        finally:
+            self._summary_task = None
+
+    def on_metrics(self, agent_metrics: metrics.AgentMetrics):
+        if isinstance(agent_metrics, metrics.PipelineLLMMetrics):
+            self.prompt_tokens.append(agent_metrics.prompt_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        prompt_tokens = self.prompt_tokens or [0]
+        sent_tokens = self.sent_tokens or [0]
+        return {
+            "requests": len(self.sent_tokens),
+            "summaries": self.summaries,
+            "summary_tokens": len(self.summary) // CHARS_PER_TOKEN,
+            "prompt_tokens_first": prompt_tokens[0],
+            "prompt_tokens_last": prompt_tokens[-1],
+            "prompt_tokens_max": max(prompt_tokens),
+            "context_tokens_max": max(sent_tokens),
+        }
@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from livekit.agents import metrics
+from livekit.agents.pipeline import VoicePipelineAgent
+
+logger = logging.getLogger("adaptive-endpointing")
+
+# Bounds for the delay applied after the candidate stops speaking
+ENDPOINTING_MIN_DELAY = float(os.environ.get("ENDPOINTING_MIN_DELAY", "0.5"))
+ENDPOINTING_MIN_DELAY_FLOOR = float(os.environ.get("ENDPOINTING_MIN_DELAY_FLOOR", "0.3"))
+ENDPOINTING_MIN_DELAY_CEILING = float(os.environ.get("ENDPOINTING_MIN_DELAY_CEILING", "1.5"))
+# Bounds for the delay used when the turn detector thinks the candidate is not done
+ENDPOINTING_MAX_DELAY = float(os.environ.get("ENDPOINTING_MAX_DELAY", "5.0"))
+ENDPOINTING_MAX_DELAY_FLOOR = float(os.environ.get("ENDPOINTING_MAX_DELAY_FLOOR", "2.5"))
+ENDPOINTING_MAX_DELAY_CEILING = float(os.environ.get("ENDPOINTING_MAX_DELAY_CEILING", "7.0"))
+
+# Pauses kept per session, and how many are needed before adapting
+PAUSE_WINDOW = 50
+MIN_PAUSES = 5
+# The candidate resuming this soon after their turn was validated means we cut them off
+PREMATURE_WINDOW = 1.5
+# Delays are only changed when they move by at least this much (seconds)
+MIN_ADJUSTMENT = 0.05
+
+
+class AdaptiveEndpointing:
+    """
+    Tune VoicePipelineAgent's endpointing delays from the candidate's own pauses.
+
+    Every pause after which the candidate carried on speaking within the
+    same turn is recorded. The short delay is set just above most of
+    those pauses (the 90th percentile), and the long delay used when the
+    turn detector expects more speech is set above nearly all of them.
+    When the candidate starts speaking again right after the agent
+    validated their turn, the turn was cut off early; each such premature
+    endpoint widens both delays, and clean turns slowly narrow them again.
+    Both delays stay within the configured bounds.
+
+    Each change is logged with the pause statistics and the premature
+    endpoint rate, so response latency can be compared against the
+    interruption rate.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = ENDPOINTING_MIN_DELAY,
+        max_delay: float = ENDPOINTING_MAX_DELAY,
+        min_delay_bounds: tuple = (ENDPOINTING_MIN_DELAY_FLOOR, ENDPOINTING_MIN_DELAY_CEILING),
+        max_delay_bounds: tuple = (ENDPOINTING_MAX_DELAY_FLOOR, ENDPOINTING_MAX_DELAY_CEILING),
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_delay_bounds = min_delay_bounds
+        self.max_delay_bounds = max_delay_bounds
+        self.pauses: deque = deque(maxlen=PAUSE_WINDOW)
+        self.turns = 0
+        self.premature = 0
+        self.adjustments = 0
+        # Multiplier raised by premature endpoints and decayed by clean turns
+        self._caution = 1.0
+        self._stopped_at: Optional[float] = None
+        self._validated_at: Optional[float] = None
+        self._agent: Optional[VoicePipelineAgent] = None
+
+    def attach(self, agent: VoicePipelineAgent):
+        """Listen to the agent's speech events and apply the initial delays"""
+        self._agent = agent
+        agent.on("user_started_speaking", self.on_user_started_speaking)
+        agent.on("user_stopped_speaking", self.on_user_stopped_speaking)
+        agent.on("metrics_collected", self.on_metrics_collected)
+        self._apply(self.min_delay, self.max_delay, reason="initial")
+
+    def on_user_started_speaking(self):
+        now = time.perf_counter()
+        premature = self._validated_at is not None and now - self._validated_at <= PREMATURE_WINDOW
+        if self._stopped_at is not None and (self._validated_at is None or premature):
+            # The candidate paused and carried on with the same answer
+            self.pauses.append(now - self._stopped_at)
+        if premature:
+            self.premature += 1
+            self._caution = min(self._caution * 1.2, 2.0)
+            self._adapt("premature endpoint")
+        self._stopped_at = None
+        self._validated_at = None
+
+    def on_user_stopped_speaking(self):
+        self._stopped_at = time.perf_counter()
+        self._validated_at = None
+
+    def on_metrics_collected(self, agent_metrics: metrics.AgentMetrics):
+        # End-of-utterance metrics are emitted when the agent validates the turn
+        if not isinstance(agent_metrics, metrics.PipelineEOUMetrics):
+            return
+        self.turns += 1
+        self._validated_at = time.perf_counter()
+        self._caution = max(1.0, self._caution * 0.97)
+        self._adapt("turn validated")
+
+    def _adapt(self, reason: str):
+        if len(self.pauses) < MIN_PAUSES:
+            return
+        pauses = sorted(self.pauses)
+        p90 = pauses[int(0.9 * (len(pauses) - 1))]
+        p_max = pauses[-1]
+        min_delay = _clamp(p90 * 1.1 * self._caution, *self.min_delay_bounds)
+        max_delay = _clamp(max(p_max * 1.2, min_delay) * self._caution, *self.max_delay_bounds)
+        if abs(min_delay - self.min_delay) < MIN_ADJUSTMENT and abs(max_delay - self.max_delay) < MIN_ADJUSTMENT:
+            return
+        self._apply(min_delay, max_delay, reason=reason, pause_p90=p90, pause_max=p_max)
+
+    def _apply(self, min_delay: float, max_delay: float, reason: str, **details: float):
+        previous = (self.min_delay, self.max_delay)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        if self._agent is not None:
+            # VoicePipelineAgent reads these on every end of speech
+            self._agent._opts.min_endpointing_delay = min_delay
+            self._agent._opts.max_endpointing_delay = max_delay
+            self._agent._deferred_validation._end_of_speech_delay = min_delay
+            self._agent._deferred_validation._max_endpointing_delay = max_delay
+        if reason != "initial":
+            self.adjustments += 1
+        logger.info(
+            f"Endpointing delays {previous[0]:.2f}/{previous[1]:.2f}s -> {min_delay:.2f}/{max_delay:.2f}s ({reason})",
+            extra={
+                "min_endpointing_delay": round(min_delay, 3),
+                "max_endpointing_delay": round(max_delay, 3),
+                "premature_rate": round(self.premature_rate, 3),
+                "pauses": len(self.pauses),
+                **{key: round(value, 3) for key, value in details.items()},
+            }
+        )
+
+    @property
+    def premature_rate(self) -> float:
+        """Share of validated turns the candidate continued right after"""
+        return self.premature / self.turns if self.turns else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "min_delay": round(self.min_delay, 3),
+            "max_delay": round(self.max_delay, 3),
+            "turns": self.turns,
+            "premature": self.premature,
+            "premature_rate": round(self.premature_rate, 3),
+            "adjustments": self.adjustments,
+            "pauses": len(self.pauses),
+        }
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
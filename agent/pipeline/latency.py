@@ -0,0 +1,184 @@
+import functools
+import logging
+import statistics
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from livekit.agents import metrics
+
+from utils.telemetry import increment_counter, pop_interview_timings, record_timing, timing_scope
+
+logger = logging.getLogger("turn-latency")
+
+# Turns kept per interview for the summary
+MAX_TRACED_TURNS = 500
+
+# Stages reported for every turn, in pipeline order
+TURN_STAGES = ("stt_final", "eou_delay", "llm_ttft", "tts_ttfb", "tool", "db", "response")
+
+
+class TurnLatencyTracer:
+    """
+    Break the latency of each conversational turn down by stage.
+
+    LiveKit reports end-of-utterance, LLM and TTS metrics separately, tagged
+    with the speech id of the turn they belong to; this stitches them back
+    together and adds the time spent in tool calls (and the database calls
+    they make). Every stage is also recorded in the process-wide latency
+    histogram, and the database and socket timings of the interview are
+    folded into its summary.
+
+    With preemptive synthesis the reply is generated before the turn is
+    confirmed; a generation that started before its turn's end of utterance
+    counts as a used speculation, and one whose turn never got confirmed
+    (the candidate kept talking) as a wasted one.
+    """
+
+    def __init__(self, interview_id: Optional[str] = None, max_turns: int = MAX_TRACED_TURNS):
+        self.interview_id = interview_id
+        self.max_turns = max_turns
+        self._turns: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._current: Optional[str] = None
+        self._speech_ended_at: Optional[float] = None
+        # Reply generations not tied to a confirmed turn yet: speech id -> start time
+        self._unconfirmed: Dict[str, float] = {}
+        # When recent turns were confirmed, by speech id
+        self._confirmed_at: "OrderedDict[str, float]" = OrderedDict()
+        self.speculations_used = 0
+        self.speculations_wasted = 0
+
+    def _turn(self, sequence_id: str) -> Dict[str, float]:
+        turn = self._turns.get(sequence_id)
+        if turn is None:
+            turn = self._turns[sequence_id] = {}
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+        return turn
+
+    def _set(self, turn: Dict[str, float], stage: str, seconds: float):
+        # Follow-up generations after a tool call reuse the speech id; the
+        # first value is the one the candidate waited for
+        if stage in turn:
+            return
+        turn[stage] = seconds
+        record_timing(stage, seconds, self.interview_id)
+
+    def on_metrics(self, agent_metrics: metrics.AgentMetrics):
+        """Record the metrics emitted by VoicePipelineAgent's metrics_collected event"""
+        if isinstance(agent_metrics, metrics.PipelineEOUMetrics):
+            turn = self._turn(agent_metrics.sequence_id)
+            self._current = agent_metrics.sequence_id
+            # Emitted when the turn is validated, this long after the candidate stopped
+            self._speech_ended_at = time.perf_counter() - agent_metrics.end_of_utterance_delay
+            self._set(turn, "stt_final", agent_metrics.transcription_delay)
+            self._set(turn, "eou_delay", agent_metrics.end_of_utterance_delay)
+            self._on_turn_confirmed(agent_metrics.sequence_id, agent_metrics.timestamp)
+        elif isinstance(agent_metrics, metrics.PipelineLLMMetrics):
+            self._set(self._turn(agent_metrics.sequence_id), "llm_ttft", agent_metrics.ttft)
+            self._on_generation(agent_metrics.sequence_id, agent_metrics.timestamp - agent_metrics.duration)
+        elif isinstance(agent_metrics, metrics.PipelineTTSMetrics):
+            self._set(self._turn(agent_metrics.sequence_id), "tts_ttfb", agent_metrics.ttfb)
+
+    def _on_turn_confirmed(self, sequence_id: str, confirmed_at: float):
+        self._confirmed_at[sequence_id] = confirmed_at
+        while len(self._confirmed_at) > self.max_turns:
+            self._confirmed_at.popitem(last=False)
+        if self._unconfirmed.pop(sequence_id, None) is not None:
+            self._count_speculation("used")
+        # Only the latest reply is kept when a turn is confirmed; any other
+        # generation finished so far was superseded
+        for _ in self._unconfirmed:
+            self._count_speculation("wasted")
+        self._unconfirmed.clear()
+
+    def _on_generation(self, sequence_id: str, started_at: float):
+        # LLM metrics arrive when a generation ends, which can be after its
+        # turn was confirmed; tool follow-ups reuse the id and start later
+        confirmed_at = self._confirmed_at.get(sequence_id)
+        if confirmed_at is None:
+            self._unconfirmed.setdefault(sequence_id, started_at)
+        elif started_at < confirmed_at:
+            self._count_speculation("used")
+
+    def _count_speculation(self, outcome: str):
+        if outcome == "used":
+            self.speculations_used += 1
+        else:
+            self.speculations_wasted += 1
+        increment_counter(
+            f"voice_agent_speculations_{outcome}_total",
+            f"Reply generations started before the end of the turn that were {outcome}"
+        )
+
+    def on_agent_started_speaking(self):
+        """Record the time from the end of the candidate's speech to the agent's first audio"""
+        if self._current is None or self._speech_ended_at is None:
+            return
+        self._set(self._turn(self._current), "response", time.perf_counter() - self._speech_ended_at)
+        self._speech_ended_at = None
+
+    @asynccontextmanager
+    async def tool_call(self, name: str) -> AsyncIterator[None]:
+        """
+        Time a function call made by the LLM and the database work inside it.
+
+        The time is attributed to the turn whose end of utterance was seen last.
+        """
+        started_at = time.perf_counter()
+        with timing_scope() as timings:
+            try:
+                yield
+            finally:
+                elapsed = time.perf_counter() - started_at
+                record_timing(f"tool:{name}", elapsed, self.interview_id)
+                if self._current is not None:
+                    turn = self._turn(self._current)
+                    turn["tool"] = turn.get("tool", 0.0) + elapsed
+                    turn["db"] = turn.get("db", 0.0) + timings.get("db", 0.0)
+
+    def traced(self, fnc: Callable) -> Callable:
+        """Decorate an ai_callable method so each call is timed with tool_call"""
+        @functools.wraps(fnc)
+        async def wrapper(*args, **kwargs):
+            async with self.tool_call(fnc.__name__):
+                return await fnc(*args, **kwargs)
+
+        return wrapper
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the traced turns.
+
+        Returns:
+            Dictionary with the turn count, p50/p95/max per stage in
+            milliseconds, used and wasted speculations, and the interview's
+            database and socket totals
+        """
+        stages: Dict[str, Dict[str, float]] = {}
+        for stage in TURN_STAGES:
+            samples = sorted(turn[stage] * 1000 for turn in self._turns.values() if stage in turn)
+            if samples:
+                stages[stage] = {
+                    "p50_ms": round(statistics.median(samples), 1),
+                    "p95_ms": round(_percentile(samples, 0.95), 1),
+                    "max_ms": round(samples[-1], 1),
+                }
+        # Generations still unconfirmed at the end were never played
+        for _ in self._unconfirmed:
+            self._count_speculation("wasted")
+        self._unconfirmed.clear()
+        summary = {
+            "turns": len(self._turns),
+            "stages": stages,
+            "speculation": {"used": self.speculations_used, "wasted": self.speculations_wasted},
+        }
+        if self.interview_id:
+            summary["interview"] = pop_interview_timings(self.interview_id)
+        return summary
+
+
+def _percentile(sorted_samples: List[float], fraction: float) -> float:
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index]
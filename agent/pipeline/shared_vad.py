@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+
+import numpy as np
+from livekit.agents.inference_runner import _InferenceRunner
+from livekit.agents.job import get_current_job_context
+from livekit.plugins import silero
+from livekit.plugins.silero import onnx_model
+from livekit.plugins.silero.vad import VADStream, _VADOptions
+
+logger = logging.getLogger("shared-vad")
+
+# Seconds a job waits for one VAD window before the stream fails
+SHARED_VAD_TIMEOUT = float(os.environ.get("SHARED_VAD_TIMEOUT", "2"))
+
+# Silero's recurrent state: (2, batch, 128)
+STATE_SIZE = 2 * 128
+# Window and context samples per supported sample rate
+WINDOW_SAMPLES = {16000: (512, 64), 8000: (256, 32)}
+_RATE_BY_INPUT = {window + context: rate for rate, (window, context) in WINDOW_SAMPLES.items()}
+
+
+class SharedVADRunner(_InferenceRunner):
+    """
+    Silero VAD served from the worker's inference process.
+
+    The model is loaded once per worker instead of once per job process.
+    The runner keeps no per-stream state: every request carries one audio
+    window with the stream's context samples and recurrent state, and the
+    response returns the speech probability and the updated state.
+    """
+
+    INFERENCE_METHOD = "voice_agent_silero_vad"
+
+    def initialize(self) -> None:
+        self._session = onnx_model.new_inference_session(force_cpu=True)
+        logger.info("Shared Silero VAD loaded in the inference process")
+
+    def run(self, data: bytes) -> bytes | None:
+        values = np.frombuffer(data, dtype=np.float32).copy()
+        samples = values[:-STATE_SIZE]
+        state = values[-STATE_SIZE:].reshape(2, 1, 128)
+        # Context samples come first, then the window
+        sample_rate = _RATE_BY_INPUT[len(samples)]
+        out, new_state = self._session.run(None, {
+            "input": samples.reshape(1, -1),
+            "state": state,
+            "sr": np.array(sample_rate, dtype=np.int64),
+        })
+        return np.concatenate([
+            np.asarray(out, dtype=np.float32).reshape(-1)[:1],
+            np.asarray(new_state, dtype=np.float32).reshape(-1),
+        ]).tobytes()
+
+
+class RemoteVADModel:
+    """
+    Drop-in for the silero plugin's OnnxModel that runs each window in the
+    inference process.
+
+    VADStream calls the model from its own worker thread, so each call
+    schedules the request on the job's event loop and waits for the reply.
+    """
+
+    def __init__(self, sample_rate: int):
+        if sample_rate not in WINDOW_SAMPLES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+        self._executor = get_current_job_context().inference_executor
+        self._loop = asyncio.get_event_loop()
+        self._sample_rate = sample_rate
+        self._window_size_samples, self._context_size = WINDOW_SAMPLES[sample_rate]
+        self._input = np.zeros(self._context_size + self._window_size_samples + STATE_SIZE, dtype=np.float32)
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def window_size_samples(self) -> int:
+        return self._window_size_samples
+
+    @property
+    def context_size(self) -> int:
+        return self._context_size
+
+    def __call__(self, x: np.ndarray) -> float:
+        samples = self._context_size + self._window_size_samples
+        # The previous window's tail becomes this window's context
+        self._input[:self._context_size] = self._input[self._window_size_samples:samples]
+        self._input[self._context_size:samples] = x
+        future = asyncio.run_coroutine_threadsafe(
+            self._executor.do_inference(SharedVADRunner.INFERENCE_METHOD, self._input.tobytes()),
+            self._loop
+        )
+        result = np.frombuffer(future.result(SHARED_VAD_TIMEOUT), dtype=np.float32)
+        self._input[samples:] = result[1:]
+        return float(result[0])
+
+
+class SharedVAD(silero.VAD):
+    """
+    Silero VAD whose streams run inference in the worker's inference process.
+
+    Takes the same options as silero.VAD.load() but loads no model in the
+    job process. Requires enable_shared_vad() before the worker starts.
+    """
+
+    @classmethod
+    def create(
+        cls,
+        *,
+        min_speech_duration: float = 0.05,
+        min_silence_duration: float = 0.55,
+        prefix_padding_duration: float = 0.5,
+        max_buffered_speech: float = 60.0,
+        activation_threshold: float = 0.5,
+        sample_rate: int = 16000
+    ) -> "SharedVAD":
+        opts = _VADOptions(
+            min_speech_duration=min_speech_duration,
+            min_silence_duration=min_silence_duration,
+            prefix_padding_duration=prefix_padding_duration,
+            max_buffered_speech=max_buffered_speech,
+            activation_threshold=activation_threshold,
+            sample_rate=sample_rate,
+        )
+        return cls(session=None, opts=opts)
+
+    def stream(self) -> VADStream:
+        stream = VADStream(self, self._opts, RemoteVADModel(self._opts.sample_rate))
+        self._streams.add(stream)
+        return stream
+
+
+def enable_shared_vad():
+    """
+    Serve Silero VAD inference from the worker's inference process.
+
+    Must be called on the main thread before the worker starts, like
+    enable_batched_eou. Job processes then use SharedVAD.create() instead
+    of silero.VAD.load().
+    """
+    _InferenceRunner.register_runner(SharedVADRunner)
+    logger.info("Using shared VAD inference")
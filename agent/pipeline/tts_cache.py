@@ -0,0 +1,266 @@
+import asyncio
+import dataclasses
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+from livekit import rtc
+from livekit.agents import tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+from utils.telemetry import register_gauge
+
+logger = logging.getLogger("tts-cache")
+
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".tts-cache"))
+TTS_CACHE_MAX_MB = float(os.environ.get("TTS_CACHE_MAX_MB", "50"))
+
+# Length of each frame replayed from the cache
+FRAME_MS = 100
+# File header: sample rate, channel count
+_HEADER = struct.Struct("<II")
+
+
+class PhraseCache:
+    """
+    Content-addressed store of synthesized audio on local disk.
+
+    Entries are keyed by a hash of the text, the voice settings and the
+    output format, and hold raw 16-bit PCM. Files are replaced atomically,
+    so worker processes can share one directory. When the directory grows
+    past its size limit the least recently used entries are removed; an
+    entry's modification time is refreshed every time it is read.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Decoded entries kept in memory, most recently used last
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str, voice: str, sample_rate: int, num_channels: int) -> str:
+        raw = f"{voice}\0{sample_rate}\0{num_channels}\0{text.strip()}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored entry (header and PCM) or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        if data is None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            self._remember(key, data)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return data
+
+    def contains(self, key: str) -> bool:
+        return key in self._memory or os.path.exists(self._path(key))
+
+    def put(self, key: str, sample_rate: int, num_channels: int, pcm: bytes):
+        data = _HEADER.pack(sample_rate, num_channels) + pcm
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._remember(key, data)
+        self._evict()
+
+    def load(self, keys: Iterable[str]) -> int:
+        """Read entries into memory ahead of use, returning how many were found"""
+        return sum(1 for key in keys if self.get(key) is not None)
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+_cache: Optional[PhraseCache] = None
+
+
+def get_phrase_cache() -> PhraseCache:
+    """Get the process-wide phrase cache"""
+    global _cache
+    if _cache is None:
+        _cache = PhraseCache()
+        register_gauge("voice_agent_tts_cache_hits", "TTS phrase cache hits", lambda: _cache.hits)
+        register_gauge("voice_agent_tts_cache_misses", "TTS phrase cache misses", lambda: _cache.misses)
+        register_gauge("voice_agent_tts_cache_hit_rate", "Share of cacheable phrases served from the cache", lambda: _cache.hit_rate)
+    return _cache
+
+
+def voice_key(wrapped: tts.TTS) -> str:
+    """Describe the voice settings of a TTS, so a change of voice misses the cache"""
+    return f"{wrapped.label}:{getattr(wrapped, '_opts', '')!r}"
+
+
+class CachedTTS(tts.TTS):
+    """
+    TTS wrapper that serves fixed phrases from a PhraseCache.
+
+    Only registered phrases are looked up and stored, so LLM replies, which
+    rarely repeat, still go straight to the wrapped TTS. A phrase that is
+    not cached yet is synthesized once and stored as it plays.
+    """
+
+    def __init__(self, wrapped: tts.TTS, phrases: Iterable[str] = (), cache: Optional[PhraseCache] = None):
+        super().__init__(
+            capabilities=wrapped.capabilities,
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self._wrapped = wrapped
+        self._cache = cache or get_phrase_cache()
+        self._phrases: Set[str] = {p.strip() for p in phrases}
+
+    def add_phrases(self, phrases: Iterable[str]):
+        self._phrases.update(p.strip() for p in phrases)
+
+    def phrase_key(self, text: str) -> str:
+        return PhraseCache.key(text, voice_key(self._wrapped), self.sample_rate, self.num_channels)
+
+    def prefill_cached(self) -> int:
+        """Load the registered phrases already on disk into memory; safe to call from prewarm"""
+        found = self._cache.load(self.phrase_key(p) for p in self._phrases)
+        logger.info(f"Loaded {found}/{len(self._phrases)} cached phrases")
+        return found
+
+    async def prefill(self):
+        """Synthesize every registered phrase that is not cached yet"""
+        for phrase in self._phrases:
+            if self._cache.contains(self.phrase_key(phrase)):
+                continue
+            stream = self.synthesize(phrase)
+            try:
+                async for _ in stream:
+                    pass
+            except Exception as e:
+                logger.warning(f"Could not prefill phrase {phrase[:30]!r}: {e}")
+            finally:
+                await stream.aclose()
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> tts.ChunkedStream:
+        if text.strip() not in self._phrases:
+            return self._wrapped.synthesize(text, conn_options=conn_options)
+        # The wrapped stream retries on its own
+        return _CachedChunkedStream(
+            tts=self,
+            input_text=text,
+            conn_options=dataclasses.replace(conn_options, max_retry=0),
+            inner_conn_options=conn_options,
+        )
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.SynthesizeStream:
+        return self._wrapped.stream(conn_options=conn_options)
+
+    async def aclose(self):
+        await self._wrapped.aclose()
+
+
+class _CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions, inner_conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+        self._inner_conn_options = inner_conn_options
+
+    async def _run(self):
+        cache = self._cached_tts._cache
+        key = self._cached_tts.phrase_key(self._input_text)
+        data = await asyncio.get_running_loop().run_in_executor(None, cache.get, key)
+        if data is not None:
+            cache.hits += 1
+            self._replay(data)
+            return
+
+        cache.misses += 1
+        frames: List[rtc.AudioFrame] = []
+        async with self._cached_tts._wrapped.synthesize(self._input_text, conn_options=self._inner_conn_options) as stream:
+            async for audio in stream:
+                frames.append(audio.frame)
+                self._event_ch.send_nowait(audio)
+        if frames:
+            pcm = b"".join(bytes(frame.data.cast("B")) for frame in frames)
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, cache.put, key, frames[0].sample_rate, frames[0].num_channels, pcm
+                )
+            except OSError as e:
+                logger.warning(f"Could not cache phrase: {e}")
+
+    def _replay(self, data: bytes):
+        sample_rate, num_channels = _HEADER.unpack_from(data)
+        pcm = memoryview(data)[_HEADER.size:]
+        request_id = utils.shortuuid()
+        bytes_per_frame = sample_rate * num_channels * 2 * FRAME_MS // 1000
+        for offset in range(0, len(pcm), bytes_per_frame):
+            chunk = pcm[offset:offset + bytes_per_frame]
+            self._event_ch.send_nowait(tts.SynthesizedAudio(
+                request_id=request_id,
+                frame=rtc.AudioFrame(
+                    data=bytes(chunk),
+                    sample_rate=sample_rate,
+                    num_channels=num_channels,
+                    samples_per_channel=len(chunk) // (2 * num_channels),
+                ),
+            ))
+
+
+def cache_stats() -> Dict[str, float]:
+    cache = get_phrase_cache()
+    return {"hits": cache.hits, "misses": cache.misses, "hit_rate": round(cache.hit_rate, 3)}
@@ -0,0 +1,11 @@
+-- CreateIndex
+CREATE INDEX "Interview_status_createdAt_idx" ON "Interview"("status", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Interview_createdAt_idx" ON "Interview"("createdAt");
+
+-- CreateIndex
+CREATE INDEX "Interview_candidateId_idx" ON "Interview"("candidateId");
+
+-- CreateIndex
+CREATE INDEX "InterviewTranscript_interviewId_timestamp_id_idx" ON "InterviewTranscript"("interviewId", "timestamp", "id");
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "Interview" ADD COLUMN "latencySummary" JSONB;
@@ -0,0 +1,21 @@
+import pytest
+
+from utils.prompt import resolve_roles
+
+
+@pytest.mark.parametrize("position, roles", [
+    ("Build Engineer", ("software",)),
+    ("Linux Engineer", ("software",)),
+    ("Requirements Engineer", ("software",)),
+    ("HTML Developer", ("software",)),
+    ("UI Designer", ("design",)),
+    ("ML Engineer", ("data",)),
+    ("QA Tester", ("qa",)),
+    ("Senior Data Scientist", ("data",)),
+])
+def test_resolve_roles_matches_whole_words(position, roles):
+    assert resolve_roles(position) == roles
+
+
+def test_resolve_roles_falls_back_to_department():
+    assert resolve_roles("Recruiter", "DESIGN") == ("design",)
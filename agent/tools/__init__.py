@@ -1,7 +1,15 @@
-from .db_tools import create_or_update_interview, update_interview_feedback, store_interview_transcript
+from .db_tools import (
+    create_or_update_interview,
+    update_interview_feedback,
+    store_interview_transcript,
+    get_transcript_writer,
+    close_transcript_writer,
+)
 
 __all__ = [
     "create_or_update_interview",
     "update_interview_feedback",
     "store_interview_transcript",
+    "get_transcript_writer",
+    "close_transcript_writer",
 ]
@@ -1,7 +1,11 @@
-from typing import Optional, List
+import datetime
+import uuid
+from typing import Any, Dict, Optional, List, Tuple
+
+from prisma import Json
 from models.db_operations import CandidateInput, InterviewInput, InterviewStatus, InterviewTranscriptInput, UserInput
 
-from utils import execute_db_operation
+from utils import execute_db_operation, execute_db_write
 
 async def create_candidate(data: CandidateInput):
     """Create a new candidate in the database"""
@@ -24,6 +28,19 @@ async def create_interview_transcript(data: InterviewTranscriptInput):
     
     return await execute_db_operation(operation, data)
 
+async def create_interview_transcripts(data: List[InterviewTranscriptInput]):
+    """
+    Create several interview transcript entries in a single round trip.
+    Buffered and replayed later if the database is unavailable.
+    """
+    async def operation(client, data):
+        return await client.interviewtranscript.create_many(
+            data=[entry.dict(exclude_none=True) for entry in data],
+            skip_duplicates=True
+        )
+    
+    return await execute_db_write(operation, data)
+
 async def create_user(data: UserInput):
     """Create a new user in the database"""
     async def operation(client, data):
@@ -32,7 +49,7 @@ async def create_user(data: UserInput):
     return await execute_db_operation(operation, data)
 
 async def update_interview(interview_id: str, data: dict):
-    """Update an existing interview in the database"""
+    """Update an existing interview in the database, returning None if it does not exist"""
     async def operation(client, interview_id, data):
         return await client.interview.update(
             where={"id": interview_id},
@@ -41,6 +58,10 @@ async def update_interview(interview_id: str, data: dict):
     
     return await execute_db_operation(operation, interview_id, data)
 
+async def save_latency_summary(interview_id: str, summary: Dict[str, Any]):
+    """Store the per-turn latency breakdown on an interview, returning None if it does not exist"""
+    return await update_interview(interview_id, {"latencySummary": Json(summary)})
+
 async def update_candidate(candidate_id: str, data: dict):
     """Update an existing candidate in the database"""
     async def operation(client, candidate_id, data):
@@ -51,6 +72,77 @@ async def update_candidate(candidate_id: str, data: dict):
     
     return await execute_db_operation(operation, candidate_id, data)
 
+# Fill-only upsert: an existing candidate keeps any non-empty value it already has
+CANDIDATE_UPSERT_SQL = """
+INSERT INTO "Candidate" ("id", "email", "phone", "name", "resume", "experience", "skills", "education", "updatedAt")
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
+ON CONFLICT ("{conflict}") DO UPDATE SET
+    "name" = COALESCE(NULLIF("Candidate"."name", ''), EXCLUDED."name"),
+    "resume" = COALESCE(NULLIF("Candidate"."resume", ''), EXCLUDED."resume"),
+    "experience" = COALESCE(NULLIF("Candidate"."experience", ''), EXCLUDED."experience"),
+    "skills" = COALESCE(NULLIF("Candidate"."skills", ''), EXCLUDED."skills"),
+    "education" = COALESCE(NULLIF("Candidate"."education", ''), EXCLUDED."education"),
+    "updatedAt" = NOW()
+RETURNING "id"
+"""
+
+async def _upsert_candidate(client, data: CandidateInput, match_on: str) -> str:
+    """Insert a candidate or fill in the empty fields of the one matching `match_on`"""
+    if not getattr(data, match_on):
+        candidate = await client.candidate.create(data=data.dict(exclude_none=True))
+        return candidate.id
+    rows = await client.query_raw(
+        CANDIDATE_UPSERT_SQL.format(conflict=match_on),
+        str(uuid.uuid4()),
+        data.email,
+        data.phone,
+        data.name,
+        data.resume,
+        data.experience,
+        data.skills,
+        data.education
+    )
+    return rows[0]["id"]
+
+async def save_interview_with_candidate(
+    interview_data: dict,
+    candidate_data: Optional[CandidateInput] = None,
+    interview_id: Optional[str] = None,
+    match_on: str = "email"
+):
+    """
+    Resolve the candidate and create or update the interview in one transaction.
+    
+    The candidate is matched on `match_on` (email, or phone), created if
+    missing, and only has empty fields filled in if it exists. A new
+    interview gets its id here, so a retry after a timed-out attempt that
+    did commit returns that interview instead of creating a second one.
+    
+    Returns:
+        Tuple of (candidate_id, interview)
+    """
+    new_interview_id = str(uuid.uuid4())
+
+    async def write_interview(client, candidate_id):
+        data = dict(interview_data)
+        if candidate_id:
+            data["candidateId"] = candidate_id
+        if interview_id:
+            return await client.interview.update(where={"id": interview_id}, data=data)
+        return await client.interview.upsert(
+            where={"id": new_interview_id},
+            data={"create": {**data, "id": new_interview_id}, "update": {}}
+        )
+
+    async def operation(client, interview_data, candidate_data, interview_id, match_on):
+        if candidate_data is None:
+            return None, await write_interview(client, None)
+        async with client.tx() as tx:
+            candidate_id = await _upsert_candidate(tx, candidate_data, match_on)
+            return candidate_id, await write_interview(tx, candidate_id)
+    
+    return await execute_db_operation(operation, interview_data, candidate_data, interview_id, match_on)
+
 async def get_user_by_email(email: str):
     """Get a user by email"""
     async def operation(client, email):
@@ -79,12 +171,35 @@ async def get_interview_by_id(interview_id: str):
     
     return await execute_db_operation(operation, interview_id)
 
-async def get_interview_transcripts(interview_id: str):
-    """Get all transcript entries for an interview"""
-    async def operation(client, interview_id):
+async def get_interview_transcripts(
+    interview_id: str,
+    after: Optional[Tuple[datetime.datetime, str]] = None,
+    since: Optional[datetime.datetime] = None,
+    limit: Optional[int] = None
+):
+    """
+    Get transcript entries for an interview in (timestamp, id) order.
+    
+    Pass the (timestamp, id) of the last entry already seen as `after` to
+    page, or `since` to only get entries newer than a point in time.
+    """
+    async def operation(client, interview_id, after, since, limit):
+        where = {"interviewId": interview_id}
+        if after:
+            timestamp, entry_id = after
+            where["OR"] = [
+                {"timestamp": {"gt": timestamp}},
+                {"timestamp": timestamp, "id": {"gt": entry_id}}
+            ]
+        elif since:
+            where["timestamp"] = {"gt": since}
         return await client.interviewtranscript.find_many(
-            where={"interviewId": interview_id},
-            order_by={"timestamp": "asc"}
+            where=where,
+            order_by=[
+                {"timestamp": "asc"},
+                {"id": "asc"}
+            ],
+            take=limit
         )
     
-    return await execute_db_operation(operation, interview_id)
+    return await execute_db_operation(operation, interview_id, after, since, limit)
@@ -2,26 +2,103 @@ import logging
 from typing import Optional, Dict, Any
 import datetime
 import asyncio
+import os
+import uuid
 
 from .db_operations import (
-    create_candidate,
-    create_interview,
-    create_interview_transcript,
+    create_interview_transcripts,
     update_interview,
-    update_candidate,
-    get_candidate_by_email,
-    get_candidate_by_phone,
-    get_interview_by_id,
-    get_interview_transcripts
+    save_interview_with_candidate
 )
 
-from models.db_operations import InterviewInput, CandidateInput, InterviewTranscriptInput, InterviewStatus, SpeakerType
+from utils import flush_spilled_writes, is_unique_violation
+from utils.runtime_monitor import spawn, watch_backlog
+from models.db_operations import InterviewInput, CandidateInput, InterviewTranscriptInput, InterviewStatus
 
 # Import socket client for real-time updates
-from .socket_client import send_transcript_update, send_evaluation_update, join_interview_room
+from .socket_client import send_transcript_update, send_evaluation_update
 
 logger = logging.getLogger("db-tools")
 
+# Transcript write-behind settings
+TRANSCRIPT_QUEUE_SIZE = int(os.environ.get("TRANSCRIPT_QUEUE_SIZE", "1000"))
+TRANSCRIPT_BATCH_SIZE = int(os.environ.get("TRANSCRIPT_BATCH_SIZE", "50"))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.environ.get("TRANSCRIPT_FLUSH_INTERVAL", "0.5"))
+
+class EvaluationCoalescer:
+    """
+    Merge evaluation updates for the same interview that overlap a write.
+    
+    An update is written right away when no write for its interview is in
+    flight. Updates arriving while one is in flight are merged into a single
+    trailing write (later values win), started as soon as the current one
+    finishes. Every write sends one `update-evaluation` event, and every
+    caller receives the interview resulting from the write that included
+    its data (or None if it does not exist).
+    """
+    
+    def __init__(self):
+        # Interviews with a write in flight -> trailing update waiting for it, if any
+        self._in_flight: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.writes = 0
+        self.merged = 0
+    
+    async def update(self, interview_id: str, data: Dict[str, Any]):
+        if interview_id not in self._in_flight:
+            self._in_flight[interview_id] = None
+            return await self._write(interview_id, dict(data))
+        
+        trailing = self._in_flight[interview_id]
+        if trailing is None:
+            trailing = {"data": {}, "future": asyncio.get_running_loop().create_future()}
+            self._in_flight[interview_id] = trailing
+        else:
+            self.merged += 1
+        trailing["data"].update(data)
+        return await asyncio.shield(trailing["future"])
+    
+    async def _write(self, interview_id: str, data: Dict[str, Any]):
+        try:
+            interview = await update_interview(interview_id, data)
+            self.writes += 1
+            if interview:
+                await send_evaluation_update(interview_id, data)
+            return interview
+        finally:
+            trailing = self._in_flight.pop(interview_id, None)
+            if trailing is not None:
+                self._in_flight[interview_id] = None
+                spawn(self._write_trailing(interview_id, trailing), "evaluation_flush")
+    
+    async def _write_trailing(self, interview_id: str, trailing: Dict[str, Any]):
+        future = trailing["future"]
+        try:
+            interview = await self._write(interview_id, trailing["data"])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(interview)
+
+
+_evaluation_coalescer: Optional[EvaluationCoalescer] = None
+
+def get_evaluation_coalescer() -> EvaluationCoalescer:
+    """
+    Get or create the per-process evaluation update coalescer.
+    
+    Returns:
+        The shared EvaluationCoalescer instance
+    """
+    global _evaluation_coalescer
+    
+    if _evaluation_coalescer is None:
+        _evaluation_coalescer = EvaluationCoalescer()
+        
+    return _evaluation_coalescer
+
+
 async def create_or_update_interview(
     interview_id: Optional[str] = None,
     position: Optional[str] = None,
@@ -64,56 +141,23 @@ async def create_or_update_interview(
         Dictionary with created/updated interview details including candidate information
     """
     try:
-        candidate_id = None
-        
-        # First check if candidate exists by email or phone
-        existing_candidate = None
-        if candidate_email:
-            existing_candidate = await get_candidate_by_email(candidate_email)
-        
-        if not existing_candidate and candidate_phone:
-            existing_candidate = await get_candidate_by_phone(candidate_phone)
-            
-        if existing_candidate:
-            candidate_id = existing_candidate.id
-            
-            # Update candidate with any new information
-            candidate_update_data = {}
-            if candidate_name and not existing_candidate.name:
-                candidate_update_data["name"] = candidate_name
-            if candidate_resume and not existing_candidate.resume:
-                candidate_update_data["resume"] = candidate_resume
-            if candidate_experience and not existing_candidate.experience:
-                candidate_update_data["experience"] = candidate_experience
-            if candidate_education and not existing_candidate.education:
-                candidate_update_data["education"] = candidate_education
-            if candidate_skills and not existing_candidate.skills:
-                candidate_update_data["skills"] = candidate_skills
-                
-            if candidate_update_data:
-                await update_candidate(candidate_id, candidate_update_data)
-                logger.info(f"Updated candidate with ID: {candidate_id}")
-        else:
-            # Create new candidate
-            if any([candidate_name, candidate_email, candidate_phone, candidate_experience, 
-                   candidate_education, candidate_skills, candidate_resume]):
-                candidate_data = CandidateInput(
-                    name=candidate_name,
-                    email=candidate_email,
-                    phone=candidate_phone,
-                    experience=candidate_experience,
-                    education=candidate_education,
-                    skills=candidate_skills,
-                    resume=candidate_resume
-                )
-                candidate = await create_candidate(candidate_data)
-                if candidate:
-                    candidate_id = candidate.id
-                    logger.info(f"Created candidate with ID: {candidate_id}")
+        # Candidate resolution and the interview write happen in one
+        # transaction; the candidate is upserted by email (or phone)
+        candidate_data = None
+        if any([candidate_name, candidate_email, candidate_phone, candidate_experience, 
+               candidate_education, candidate_skills, candidate_resume]):
+            candidate_data = CandidateInput(
+                name=candidate_name,
+                email=candidate_email,
+                phone=candidate_phone,
+                experience=candidate_experience,
+                education=candidate_education,
+                skills=candidate_skills,
+                resume=candidate_resume
+            )
         
         # Prepare interview data
         interview_data = InterviewInput(
-            candidateId=candidate_id,
             position=position,
             department=department,
             level=level,
@@ -121,23 +165,31 @@ async def create_or_update_interview(
             feedback=feedback,
             overallScore=overall_score,
             status=status
-        )
+        ).dict(exclude_none=True)
+        
+        match_on = "email" if candidate_email else "phone"
+        try:
+            candidate_id, interview = await save_interview_with_candidate(
+                interview_data, candidate_data, interview_id, match_on
+            )
+        except Exception as e:
+            # The email is new but the phone belongs to an existing candidate
+            if not (candidate_email and candidate_phone and is_unique_violation(e)):
+                raise
+            candidate_id, interview = await save_interview_with_candidate(
+                interview_data, candidate_data, interview_id, "phone"
+            )
         
+        if not interview:
+            logger.error(f"Failed to save interview {interview_id or ''}")
+            return {"success": False, "error": "Failed to save interview session"}
         if interview_id:
-            # Update existing interview
-            interview = await update_interview(interview_id, interview_data.dict(exclude_none=True))
-            if not interview:
-                logger.error(f"Failed to update interview {interview_id}")
-                return {"success": False, "error": "Failed to update interview session"}
             logger.info(f"Updated interview with ID: {interview_id}")
         else:
-            # Create new interview
-            interview = await create_interview(interview_data)
-            if not interview:
-                logger.error("Failed to create interview")
-                return {"success": False, "error": "Failed to create interview session"}
             logger.info(f"Created interview with ID: {interview.id}")
             interview_id = interview.id
+        if candidate_id:
+            logger.info(f"Resolved candidate with ID: {candidate_id}")
         
         return {
             "success": True,
@@ -194,10 +246,7 @@ async def update_interview_feedback(
         Dictionary with updated interview details
     """
     try:
-        # Validate interview exists
-        interview = await get_interview_by_id(interview_id)
-        if not interview:
-            logger.error(f"Interview not found: {interview_id}")
+        if not interview_id:
             return {"success": False, "error": "Interview not found"}
         
         # Prepare update data
@@ -233,14 +282,12 @@ async def update_interview_feedback(
         if recommendation_notes is not None:
             update_data["recommendationNotes"] = recommendation_notes
             
-        # Update interview
-        updated_interview = await update_interview(interview_id, update_data)
+        # Update interview; updates arriving while a write for this interview
+        # is in flight are merged into one follow-up write and evaluation update
+        updated_interview = await get_evaluation_coalescer().update(interview_id, update_data)
         if not updated_interview:
-            logger.error(f"Failed to update interview feedback: {interview_id}")
-            return {"success": False, "error": "Failed to update interview feedback"}
-        
-        # Send real-time evaluation update
-        asyncio.create_task(send_evaluation_update(interview_id, update_data))
+            logger.error(f"Interview not found: {interview_id}")
+            return {"success": False, "error": "Interview not found"}
             
         return {
             "success": True,
@@ -255,45 +302,233 @@ async def update_interview_feedback(
         return {"success": False, "error": str(e)}
 
 
-async def store_interview_transcript(interview_id: str, speaker_type: str, content: str):
+class TranscriptWriter:
     """
-    Store a new interview transcript entry in the database and send real-time update.
-    
-    Args:
-        interview_id: ID of the interview
-        speaker_type: Type of speaker (AGENT, CANDIDATE, SYSTEM)
-        content: Content of the message
+    Per-process write-behind sink for interview transcript entries.
     
-    Returns:
-        The created transcript entry
+    Entries are buffered in a bounded queue and written with a single
+    create_many per batch, flushed when the batch is full or the flush
+    interval elapses. A single consumer drains the queue in FIFO order, so
+    entries of one interview are written and broadcast in the order they
+    were submitted.
     """
-    try:
-        # Create transcript data
-        interview_transcript_data = InterviewTranscriptInput(
+    
+    def __init__(
+        self,
+        max_queue_size: int = TRANSCRIPT_QUEUE_SIZE,
+        batch_size: int = TRANSCRIPT_BATCH_SIZE,
+        flush_interval: float = TRANSCRIPT_FLUSH_INTERVAL
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        # Broadcasts of written batches still being sent
+        self._broadcasts: set = set()
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+    
+    def start(self):
+        """Start the background flush task if it is not already running"""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = spawn(self._run(), "transcript_writer")
+    
+    @property
+    def depth(self) -> int:
+        """Number of entries waiting to be flushed"""
+        return self._queue.qsize()
+    
+    def _build_entry(self, interview_id: str, speaker_type: str, content: str) -> InterviewTranscriptInput:
+        # Ids and timestamps are assigned at submit time so batching does not
+        # change the stored order or the data broadcast to the dashboard
+        return InterviewTranscriptInput(
+            id=str(uuid.uuid4()),
             interviewId=interview_id,
             speakerType=speaker_type,
-            content=content
+            content=content,
+            timestamp=datetime.datetime.now(datetime.timezone.utc)
         )
+    
+    async def write(self, interview_id: str, speaker_type: str, content: str) -> Optional[InterviewTranscriptInput]:
+        """
+        Queue a transcript entry, waiting for space if the queue is full.
         
-        # Store in database
-        result = await create_interview_transcript(interview_transcript_data)
-        if not result:
-            logger.error(f"Failed to create transcript entry for interview {interview_id}")
+        Returns:
+            The queued entry, or None if the writer is shutting down
+        """
+        if self._closing:
+            logger.warning(f"Transcript writer closing, dropping entry for interview {interview_id}")
+            self.dropped += 1
             return None
-            
-        logger.info(f"Created transcript entry for interview {interview_id}")
+        self.start()
+        entry = self._build_entry(interview_id, speaker_type, content)
+        await self._queue.put(entry)
+        return entry
+    
+    def submit(self, interview_id: str, speaker_type: str, content: str) -> Optional[InterviewTranscriptInput]:
+        """
+        Queue a transcript entry from synchronous code (e.g. event handlers).
         
-        # Send real-time update via WebSocket
-        transcript_data = {
-            'speakerType': speaker_type,
-            'content': content,
-            'timestamp': datetime.datetime.now().isoformat()
-        }
+        Never blocks; if the queue is full the entry is dropped and counted
+        instead of spawning a task to wait for space.
+        
+        Returns:
+            The queued entry, or None if it was dropped
+        """
+        if self._closing:
+            logger.warning(f"Transcript writer closing, dropping entry for interview {interview_id}")
+            self.dropped += 1
+            return None
+        self.start()
+        entry = self._build_entry(interview_id, speaker_type, content)
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Transcript queue full ({self._queue.maxsize}), dropping entry for interview {interview_id}")
+            return None
+        return entry
+    
+    async def _next_batch(self) -> list:
+        """Wait for the first entry, then collect more until the batch is full or the interval elapses"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Pick up anything already queued without waiting further
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+    
+    async def _flush(self, batch: list):
+        """Write one batch to the database and broadcast it"""
+        try:
+            # None means the batch was buffered for replay while the database
+            # is down; it will still be written, so broadcast it as usual
+            await create_interview_transcripts(batch)
+            self.written += len(batch)
+            logger.info(f"Flushed {len(batch)} transcript entries")
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Error flushing {len(batch)} transcript entries: {str(e)}")
+            return
         
-        # Send update in a non-blocking way
-        asyncio.create_task(send_transcript_update(interview_id, transcript_data))
+        # Broadcast in the background so socket backpressure never holds up
+        # the next batch's database write
+        task = spawn(self._broadcast(batch), "transcript_broadcast")
+        self._broadcasts.add(task)
+        task.add_done_callback(self._broadcasts.discard)
+    
+    async def _broadcast(self, batch: list):
+        """Send the real-time updates for a written batch, in order"""
+        for entry in batch:
+            await send_transcript_update(entry.interviewId, {
+                'id': entry.id,
+                'speakerType': entry.speakerType.value,
+                'content': entry.content,
+                'timestamp': entry.timestamp.isoformat()
+            })
+    
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def close(self, timeout: Optional[float] = 10.0):
+        """
+        Stop accepting entries, flush everything still queued and wait for
+        the written batches to be broadcast.
         
-        return result
+        Args:
+            timeout: Maximum seconds to wait for the queue to drain
+        """
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out draining transcript queue, {self.depth} entries not written")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Hand the last batches to the socket client before it is closed
+        if self._broadcasts:
+            await asyncio.wait(set(self._broadcasts), timeout=timeout)
+        logger.info(f"Transcript writer closed (written={self.written}, failed={self.failed}, dropped={self.dropped})")
+
+
+_transcript_writer: Optional[TranscriptWriter] = None
+
+# Warn before the queue fills up and submit() starts dropping entries
+watch_backlog(
+    "transcript",
+    lambda: _transcript_writer.depth if _transcript_writer is not None else 0,
+    TRANSCRIPT_QUEUE_SIZE // 2
+)
+
+def get_transcript_writer() -> TranscriptWriter:
+    """
+    Get or create the per-process transcript writer.
+    
+    Returns:
+        The shared TranscriptWriter instance
+    """
+    global _transcript_writer
+    
+    if _transcript_writer is None:
+        _transcript_writer = TranscriptWriter()
+        
+    return _transcript_writer
+
+async def close_transcript_writer() -> None:
+    """Drain and stop the transcript writer if it exists."""
+    global _transcript_writer
+    
+    if _transcript_writer is not None:
+        await _transcript_writer.close()
+        _transcript_writer = None
+    
+    # Give writes buffered during a database outage a last chance to land
+    pending = await flush_spilled_writes()
+    if pending:
+        logger.error(f"{pending} buffered transcript writes were not written before shutdown")
+
+
+async def store_interview_transcript(interview_id: str, speaker_type: str, content: str):
+    """
+    Queue a new interview transcript entry for storage and real-time update.
+    
+    The entry is written in the next batch of the transcript writer; this
+    waits only if the write queue is full.
+    
+    Args:
+        interview_id: ID of the interview
+        speaker_type: Type of speaker (AGENT, CANDIDATE, SYSTEM)
+        content: Content of the message
+    
+    Returns:
+        The queued transcript entry
+    """
+    try:
+        return await get_transcript_writer().write(interview_id, speaker_type, content)
     except Exception as e:
         logger.error(f"Error storing interview transcript: {str(e)}")
         return None
@@ -2,122 +2,359 @@ import logging
 import socketio
 import asyncio
 import os
+import time
 import uuid
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Dict, Any, Optional, Set
 
-logger = logging.getLogger("socket-client")
-
-# Create a Socket.io client instance
-sio = socketio.AsyncClient()
-SOCKET_CONNECTED = False
+from utils.telemetry import record_timing
+from utils.runtime_monitor import spawn, watch_backlog
 
-# Generate a unique agent ID
-AGENT_ID = str(uuid.uuid4())
+logger = logging.getLogger("socket-client")
 
 # Get the WebSocket server URL from environment variable or use default
 WEBSOCKET_URL = os.environ.get("WEBSOCKET_URL", "http://localhost:4000")
 
-@sio.event
-async def connect():
-    """Handle socket connection event"""
-    global SOCKET_CONNECTED
-    SOCKET_CONNECTED = True
-    logger.info(f"Connected to WebSocket server at {WEBSOCKET_URL}")
-
-@sio.event
-async def connect_error(data):
-    """Handle connection error"""
-    global SOCKET_CONNECTED
-    SOCKET_CONNECTED = False
-    logger.error(f"Connection error: {data}")
-
-@sio.event
-async def disconnect():
-    """Handle socket disconnection"""
-    global SOCKET_CONNECTED
-    SOCKET_CONNECTED = False
-    logger.info("Disconnected from WebSocket server")
-
-async def connect_socket():
-    """Connect to the WebSocket server"""
-    global SOCKET_CONNECTED
-    if not SOCKET_CONNECTED:
-        try:
-            await sio.connect(WEBSOCKET_URL, wait_timeout=10)
+# Outbound events kept per session while disconnected or backed up
+SOCKET_OUTBOUND_QUEUE_SIZE = int(os.environ.get("SOCKET_OUTBOUND_QUEUE_SIZE", "500"))
+SOCKET_RECONNECT_WAIT = float(os.environ.get("SOCKET_RECONNECT_WAIT", "5"))
+# Failed emits of one event before it is dropped
+SOCKET_SEND_ATTEMPTS = int(os.environ.get("SOCKET_SEND_ATTEMPTS", "5"))
+
+# Sessions by the interview ids they have joined, used to route updates
+_sessions: Dict[str, "SocketSession"] = {}
+
+
+class SocketSession:
+    """
+    Real-time connection for one interview job.
+
+    Each job owns its own Socket.io client, so ending one interview never
+    disconnects the others hosted by the same worker process. Joined
+    interview rooms are re-joined automatically after a reconnect.
+
+    Outbound events go through a bounded queue drained by a single sender,
+    so they are emitted in order. While disconnected they are held and
+    replayed on reconnect. A queued evaluation update is merged with any
+    newer one for the same interview, and when the queue is full the oldest
+    event is dropped.
+    """
+
+    def __init__(self, url: str = WEBSOCKET_URL):
+        self.url = url
+        # Generate a unique agent ID
+        self.agent_id = str(uuid.uuid4())
+        self.connected = False
+        self.interview_ids: Set[str] = set()
+        self._closed = False
+        self._connect_lock = asyncio.Lock()
+        self._connected_event = asyncio.Event()
+        self._outbox: deque = deque()
+        self._pending_evaluations: Dict[str, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+        self.max_queue_size = SOCKET_OUTBOUND_QUEUE_SIZE
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.sio = socketio.AsyncClient(
+            reconnection=True,
+            reconnection_delay=1,
+            reconnection_delay_max=10,
+            randomization_factor=0.5
+        )
+        self.sio.on("connect", self._on_connect)
+        self.sio.on("connect_error", self._on_connect_error)
+        self.sio.on("disconnect", self._on_disconnect)
+
+    async def _on_connect(self):
+        """Handle socket connection event"""
+        self.connected = True
+        logger.info(f"Connected to WebSocket server at {self.url} (agent {self.agent_id})")
+        # After an automatic reconnect the server has forgotten our rooms
+        for interview_id in list(self.interview_ids):
+            await self._identify(interview_id)
+        # Rooms are joined, so queued events can be replayed
+        self._connected_event.set()
+
+    async def _on_connect_error(self, data):
+        """Handle connection error"""
+        self.connected = False
+        self._connected_event.clear()
+        logger.error(f"Connection error: {data}")
+
+    async def _on_disconnect(self):
+        """Handle socket disconnection"""
+        self.connected = False
+        self._connected_event.clear()
+        logger.info(f"Disconnected from WebSocket server (agent {self.agent_id})")
+
+    async def connect(self) -> bool:
+        """Connect to the WebSocket server"""
+        if self.connected:
             return True
-        except Exception as e:
-            logger.error(f"Error connecting to WebSocket: {str(e)}")
+        if self._closed:
             return False
-    return True
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            try:
+                if self.sio.connected:
+                    # The client is still up but unusable; connect() would fail with "Already connected"
+                    await self.sio.disconnect()
+                await self.sio.connect(self.url, wait_timeout=10)
+                return True
+            except Exception as e:
+                logger.error(f"Error connecting to WebSocket: {str(e)}")
+                return False
 
-async def join_interview_room(interview_id: str):
-    """Join an interview room for real-time updates"""
-    if not SOCKET_CONNECTED:
-        if not await connect_socket():
-            return False
-    
-    try:
+    async def _identify(self, interview_id: str):
         # First join the interview room
-        await sio.emit('join-interview', interview_id)
+        await self.sio.emit('join-interview', interview_id)
         logger.info(f"Joined interview room: {interview_id}")
-        
+
         # Then identify as an agent
-        await sio.emit('agent-identify', {
-            'agentId': AGENT_ID,
+        await self.sio.emit('agent-identify', {
+            'agentId': self.agent_id,
             'interviewId': interview_id,
             'name': 'Interview Agent',
             'timestamp': asyncio.get_event_loop().time()
         })
-        logger.info(f"Identified as agent {AGENT_ID} for interview {interview_id}")
-        
-        return True
-    except Exception as e:
-        logger.error(f"Error joining interview room: {str(e)}")
-        return False
+        logger.info(f"Identified as agent {self.agent_id} for interview {interview_id}")
 
-async def send_transcript_update(interview_id: str, transcript_data: Dict[str, Any]):
-    """Send a transcript update through WebSocket"""
-    if not SOCKET_CONNECTED:
-        if not await connect_socket():
+    async def join(self, interview_id: str) -> bool:
+        """Join an interview room for real-time updates"""
+        self.interview_ids.add(interview_id)
+        _sessions[interview_id] = self
+
+        if not self.connected:
+            # The connect handler joins the room once connected
+            return await self.connect()
+
+        try:
+            await self._identify(interview_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error joining interview room: {str(e)}")
             return False
-    
-    try:
-        await sio.emit('new-transcript', {
-            'interviewId': interview_id,
-            'speakerType': transcript_data.get('speakerType'),
-            'content': transcript_data.get('content')
-        })
-        logger.info(f"Sent transcript update for interview {interview_id}")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending transcript update: {str(e)}")
-        return False
 
-async def send_evaluation_update(interview_id: str, evaluation_data: Dict[str, Any]):
-    """Send an evaluation update through WebSocket"""
-    if not SOCKET_CONNECTED:
-        if not await connect_socket():
+    @property
+    def depth(self) -> int:
+        """Number of events waiting to be sent"""
+        return len(self._outbox)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "depth": self.depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    def send(self, event: str, data: Dict[str, Any], coalesce_key: Optional[str] = None) -> bool:
+        """
+        Queue an event for ordered delivery without waiting for the network.
+
+        Args:
+            event: Socket.io event name
+            data: Event payload
+            coalesce_key: Events with the same key still waiting in the queue
+                are merged into one (payload dicts are updated in place)
+
+        Returns:
+            True if the event was queued or merged, False if the session is closed
+        """
+        if self._closed:
             return False
-    
-    try:
-        await sio.emit('update-evaluation', {
-            'interviewId': interview_id,
-            'evaluationData': evaluation_data
-        })
-        logger.info(f"Sent evaluation update for interview {interview_id}")
+
+        if coalesce_key is not None:
+            pending = self._pending_evaluations.get(coalesce_key)
+            if pending is not None:
+                pending["merge"](pending["data"], data)
+                self.coalesced += 1
+                return True
+
+        if len(self._outbox) >= self.max_queue_size:
+            dropped = self._outbox.popleft()
+            if dropped.get("key") is not None:
+                self._pending_evaluations.pop(dropped["key"], None)
+            self.dropped += 1
+            logger.warning(f"Socket outbound queue full ({self.max_queue_size}), dropped {dropped['event']}")
+
+        entry = {"event": event, "data": data, "key": coalesce_key, "queued_at": time.perf_counter()}
+        if coalesce_key is not None:
+            entry["merge"] = _merge_evaluation
+            self._pending_evaluations[coalesce_key] = entry
+        self._outbox.append(entry)
+        self._wakeup.set()
+        self._ensure_sender()
         return True
-    except Exception as e:
-        logger.error(f"Error sending evaluation update: {str(e)}")
-        return False
 
-async def disconnect_socket():
-    """Disconnect from the WebSocket server"""
-    global SOCKET_CONNECTED
-    if SOCKET_CONNECTED:
+    def _ensure_sender(self):
+        if self._sender is None or self._sender.done():
+            self._sender = spawn(self._run_sender(), "socket_sender")
+
+    async def _wait_until_connected(self):
+        while not self._connected_event.is_set() and not self._closed:
+            try:
+                # Give automatic reconnection a chance before connecting ourselves
+                await asyncio.wait_for(self._connected_event.wait(), SOCKET_RECONNECT_WAIT)
+            except asyncio.TimeoutError:
+                await self.connect()
+
+    async def _run_sender(self):
+        """Emit queued events one at a time, holding them while disconnected"""
+        while not self._closed or self._outbox:
+            if not self._outbox:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await self._wait_until_connected()
+            if not self._connected_event.is_set():
+                break
+
+            entry = self._outbox[0]
+            if entry.get("key") is not None:
+                # No longer mergeable once it is being sent
+                self._pending_evaluations.pop(entry["key"], None)
+            try:
+                await self.sio.emit(entry["event"], entry["data"])
+            except Exception as e:
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                if entry["attempts"] >= SOCKET_SEND_ATTEMPTS:
+                    if self._outbox and self._outbox[0] is entry:
+                        self._outbox.popleft()
+                    self.dropped += 1
+                    logger.error(f"Dropping {entry['event']} after {entry['attempts']} failed attempts: {str(e)}")
+                    continue
+                if self.sio.connected:
+                    # Still connected, so no reconnect will come; retry after a short pause
+                    logger.warning(f"Error sending {entry['event']}, retrying: {str(e)}")
+                    await asyncio.sleep(0.2 * entry["attempts"])
+                    continue
+                logger.error(f"Error sending {entry['event']}, will retry after reconnect: {str(e)}")
+                self.connected = False
+                self._connected_event.clear()
+                continue
+            # The entry may have been dropped for space while it was in flight
+            if self._outbox and self._outbox[0] is entry:
+                self._outbox.popleft()
+            self.sent += 1
+            # Time from queueing to delivery, including any wait for a reconnect
+            record_timing("socket", time.perf_counter() - entry["queued_at"], entry["data"].get("interviewId"))
+
+    async def flush(self, timeout: float = 5.0) -> int:
+        """
+        Wait for queued events to be sent.
+
+        Returns:
+            The number of events still queued
+        """
+        if self._sender is not None and not self._sender.done() and self._outbox:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while self._outbox and loop.time() < deadline and self.connected:
+                await asyncio.sleep(0.05)
+        return len(self._outbox)
+
+    async def emit(self, event: str, data: Dict[str, Any]) -> bool:
+        """Queue an event for ordered delivery (see send)"""
+        return self.send(event, data)
+
+    async def close(self) -> bool:
+        """Send what is queued, then disconnect and stop routing this session's interviews"""
+        remaining = await self.flush()
+        if remaining:
+            logger.warning(f"Closing socket session with {remaining} unsent events")
+        self._closed = True
+        for interview_id in self.interview_ids:
+            if _sessions.get(interview_id) is self:
+                del _sessions[interview_id]
+
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        self._wakeup.set()
+
         try:
-            await sio.disconnect()
+            await self.sio.disconnect()
             return True
         except Exception as e:
             logger.error(f"Error disconnecting from WebSocket: {str(e)}")
             return False
-    return True 
\ No newline at end of file
+
+
+def _merge_evaluation(pending: Dict[str, Any], newer: Dict[str, Any]):
+    """Fold a newer update-evaluation payload into one still waiting to be sent"""
+    pending["evaluationData"].update(newer.get("evaluationData") or {})
+
+
+def get_socket_stats() -> Dict[str, Any]:
+    """
+    Get outbound queue counters summed over all live socket sessions.
+
+    Returns:
+        Dictionary with session count, queue depth, sent, dropped and coalesced counts
+    """
+    sessions = set(_sessions.values())
+    totals = {"sessions": len(sessions), "depth": 0, "sent": 0, "dropped": 0, "coalesced": 0}
+    for session in sessions:
+        stats = session.stats()
+        for key in ("depth", "sent", "dropped", "coalesced"):
+            totals[key] += stats[key]
+    return totals
+
+
+# Warn while a session's queue is half full, before it starts dropping events
+watch_backlog(
+    "socket",
+    lambda: max((session.depth for session in set(_sessions.values())), default=0),
+    SOCKET_OUTBOUND_QUEUE_SIZE // 2,
+    help="Events waiting in the fullest socket session outbound queue"
+)
+
+
+def get_socket_session(interview_id: str) -> Optional[SocketSession]:
+    """Get the socket session that has joined an interview, if any"""
+    return _sessions.get(interview_id)
+
+async def send_transcript_update(interview_id: str, transcript_data: Dict[str, Any]):
+    """
+    Broadcast an already-stored transcript entry through WebSocket.
+
+    The server only relays this event to the interview room; it does not
+    write the entry again.
+    """
+    session = get_socket_session(interview_id)
+    if session is None:
+        logger.warning(f"No socket session for interview {interview_id}, transcript update not sent")
+        return False
+
+    queued = session.send('broadcast-transcript', {
+        'id': transcript_data.get('id'),
+        'interviewId': interview_id,
+        'speakerType': transcript_data.get('speakerType'),
+        'content': transcript_data.get('content'),
+        'timestamp': transcript_data.get('timestamp')
+    })
+    if queued:
+        logger.info(f"Queued transcript update for interview {interview_id}")
+    return queued
+
+async def send_evaluation_update(interview_id: str, evaluation_data: Dict[str, Any]):
+    """Send an evaluation update through WebSocket"""
+    session = get_socket_session(interview_id)
+    if session is None:
+        logger.warning(f"No socket session for interview {interview_id}, evaluation update not sent")
+        return False
+
+    # A newer evaluation for the same interview supersedes an unsent one
+    queued = session.send('update-evaluation', {
+        'interviewId': interview_id,
+        'evaluationData': dict(evaluation_data)
+    }, coalesce_key=interview_id)
+    if queued:
+        logger.info(f"Queued evaluation update for interview {interview_id}")
+    return queued
@@ -1,19 +1,31 @@
 from .db_utils import (
     execute_db_operation,
+    execute_db_write,
+    flush_spilled_writes,
+    DatabaseUnavailableError,
+    is_unique_violation,
     get_prisma_client,
     close_prisma_client,
     connect_db,
     disconnect_db,
+    get_db_stats,
 )
 
-from .prompt import ai_prompt
+from .prompt import ai_prompt, build_prompt, prompt_variant_sizes
 
 __all__ = [
     "execute_db_operation",
+    "execute_db_write",
+    "flush_spilled_writes",
+    "DatabaseUnavailableError",
+    "is_unique_violation",
     "get_prisma_client",
     "close_prisma_client",
     "connect_db",
     "disconnect_db",
-    "ai_prompt"
+    "get_db_stats",
+    "ai_prompt",
+    "build_prompt",
+    "prompt_variant_sizes"
 ]
 
@@ -2,12 +2,21 @@ import logging
 import asyncio
 import traceback
 import os
-from typing import Any, Callable, TypeVar
+import time
+import random
+from collections import deque
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
+import httpx
 from prisma import Prisma
 from prisma.errors import PrismaError
+from prisma.engine.errors import EngineConnectionError
 from dotenv import load_dotenv
 
+from .telemetry import record_timing
+from .runtime_monitor import spawn
+
 
 load_dotenv(dotenv_path=".env.local")
 
@@ -15,32 +24,214 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Connection pool and concurrency settings
+DB_CONNECTION_LIMIT = int(os.environ.get("DB_CONNECTION_LIMIT", "5"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "10"))
+DB_MAX_CONCURRENCY = int(os.environ.get("DB_MAX_CONCURRENCY", str(DB_CONNECTION_LIMIT * 2)))
+DB_OPERATION_TIMEOUT = float(os.environ.get("DB_OPERATION_TIMEOUT", "15"))
+
+# Retry and circuit breaker settings
+DB_RETRY_ATTEMPTS = int(os.environ.get("DB_RETRY_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY = float(os.environ.get("DB_RETRY_BASE_DELAY", "0.2"))
+DB_RETRY_MAX_DELAY = float(os.environ.get("DB_RETRY_MAX_DELAY", "2.0"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.environ.get("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+DB_BREAKER_RESET_TIMEOUT = float(os.environ.get("DB_BREAKER_RESET_TIMEOUT", "5"))
+DB_SPILL_BUFFER_SIZE = int(os.environ.get("DB_SPILL_BUFFER_SIZE", "5000"))
+
+# Prisma engine error codes for connection loss, pool exhaustion and timeouts
+TRANSIENT_ERROR_CODES = ("P1001", "P1002", "P1008", "P1017", "P2024", "P2034")
+# Unique constraint violations: Prisma's own, and Postgres's through raw queries
+UNIQUE_VIOLATION_CODES = ("P2002", "23505", "Unique constraint")
+
 _prisma_client = None
+_prisma_lock = asyncio.Lock()
+_db_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class DBOperationStats:
+    """Counters for time spent waiting for a slot vs. executing operations."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.operations = 0
+        self.errors = 0
+        self.conflicts = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.rejected = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_execution = 0.0
+        self.max_execution = 0.0
+
+    def record(self, wait: float, execution: float):
+        self.operations += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_execution += execution
+        self.max_execution = max(self.max_execution, execution)
+
+    def as_dict(self) -> Dict[str, Any]:
+        count = self.operations or 1
+        return {
+            "operations": self.operations,
+            "errors": self.errors,
+            "conflicts": self.conflicts,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "spill_buffer": len(_spill_buffer),
+            "breaker_state": db_breaker.state,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_wait_ms": round(self.total_wait / count * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_execution_ms": round(self.total_execution / count * 1000, 2),
+            "max_execution_ms": round(self.max_execution * 1000, 2),
+        }
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised without contacting the database while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated transient database failures.
+    
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects operations for `reset_timeout` seconds, then lets a single probe
+    through (half-open). A successful probe closes it again.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+    
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+    
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Database circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Database circuit breaker opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+db_stats = DBOperationStats()
+db_breaker = CircuitBreaker(DB_BREAKER_FAILURE_THRESHOLD, DB_BREAKER_RESET_TIMEOUT)
+
+# Writes deferred while the database is unavailable, replayed in order
+_spill_buffer: deque = deque()
+_replay_task: Optional[asyncio.Task] = None
+
+
+def get_db_stats() -> Dict[str, Any]:
+    """
+    Get a snapshot of the database operation counters.
+
+    Returns:
+        Dictionary of operation, queue wait and execution time counters
+    """
+    return db_stats.as_dict()
+
+
+def _pooled_database_url() -> Optional[str]:
+    """
+    Build the datasource URL with the query engine pool settings applied.
+
+    Values already present in DATABASE_URL take precedence.
+    """
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        return None
+
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(DB_CONNECTION_LIMIT))
+    query.setdefault("pool_timeout", str(DB_POOL_TIMEOUT))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _db_semaphore
+
+    if _db_semaphore is None:
+        _db_semaphore = asyncio.Semaphore(DB_MAX_CONCURRENCY)
+    return _db_semaphore
+
 
 async def get_prisma_client() -> Prisma:
     """
     Get or create a Prisma client instance.
     
+    Initialization is guarded by a lock so concurrent first calls share a
+    single connection.
+    
     Returns:
         A connected Prisma client instance
     """
     global _prisma_client
     
-    if _prisma_client is None:
-        logger.info("Initializing Prisma client")
-        _prisma_client = Prisma()
-        await _prisma_client.connect()
-        
+    if _prisma_client is not None:
+        return _prisma_client
+    
+    async with _prisma_lock:
+        if _prisma_client is None:
+            logger.info(
+                f"Initializing Prisma client (connection_limit={DB_CONNECTION_LIMIT}, "
+                f"max_concurrency={DB_MAX_CONCURRENCY})"
+            )
+            url = _pooled_database_url()
+            client = Prisma(datasource={"url": url}) if url else Prisma()
+            await client.connect()
+            _prisma_client = client
+    
     return _prisma_client
 
 async def close_prisma_client() -> None:
     """Close the Prisma client connection if it exists."""
     global _prisma_client
     
-    if _prisma_client is not None:
-        logger.info("Disconnecting Prisma client")
-        await _prisma_client.disconnect()
-        _prisma_client = None
+    async with _prisma_lock:
+        if _prisma_client is not None:
+            logger.info("Disconnecting Prisma client")
+            await _prisma_client.disconnect()
+            _prisma_client = None
 
 # Functions needed for seed_responders.py compatibility
 async def connect_db() -> Prisma:
@@ -60,10 +251,56 @@ async def disconnect_db() -> None:
     """
     await close_prisma_client()
 
+def _is_transient_error(error: BaseException) -> bool:
+    """Whether an error is worth retrying (connection loss, pool exhaustion, timeouts)."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, httpx.TransportError, EngineConnectionError)):
+        return True
+    if isinstance(error, PrismaError):
+        message = str(error)
+        return any(code in message for code in TRANSIENT_ERROR_CODES)
+    return False
+
+def is_unique_violation(error: BaseException) -> bool:
+    """Whether a database error (or its cause) is a unique constraint violation."""
+    message = f"{error} {error.__cause__ or ''}"
+    return any(code in message for code in UNIQUE_VIOLATION_CODES)
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt."""
+    return random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * (2 ** attempt)))
+
+async def _run_operation(operation: Callable, *args: Any, **kwargs: Any) -> T:
+    """Run a single attempt within the concurrency limit and timeout."""
+    semaphore = _get_semaphore()
+    queued_at = time.perf_counter()
+    db_stats.waiting += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        db_stats.waiting -= 1
+
+    started_at = time.perf_counter()
+    db_stats.in_flight += 1
+    try:
+        client = await get_prisma_client()
+        result = await asyncio.wait_for(operation(client, *args, **kwargs), DB_OPERATION_TIMEOUT)
+        finished_at = time.perf_counter()
+        db_stats.record(started_at - queued_at, finished_at - started_at)
+        record_timing("db", finished_at - queued_at)
+        return result
+    finally:
+        db_stats.in_flight -= 1
+        semaphore.release()
+
 async def execute_db_operation(operation: Callable, *args: Any, **kwargs: Any) -> T:
     """
     Execute a database operation with error handling.
     
+    At most DB_MAX_CONCURRENCY operations run at once per process; the rest
+    wait for a slot. Each attempt is limited to DB_OPERATION_TIMEOUT seconds.
+    Transient failures are retried with jittered exponential backoff, and
+    while the circuit breaker is open operations fail immediately.
+    
     Args:
         operation: The async function to execute
         *args: Positional arguments to pass to the operation
@@ -73,19 +310,143 @@ async def execute_db_operation(operation: Callable, *args: Any, **kwargs: Any) -
         The result of the operation
         
     Raises:
+        DatabaseUnavailableError: If the circuit breaker is open
         Exception: If the operation fails
+        asyncio.TimeoutError: If the last attempt exceeds the timeout
+    """
+    attempt = 0
+    while True:
+        if not db_breaker.allow_request():
+            db_stats.rejected += 1
+            raise DatabaseUnavailableError("Database unavailable (circuit breaker open)")
+        try:
+            result = await _run_operation(operation, *args, **kwargs)
+            db_breaker.record_success()
+            _schedule_replay()
+            return result
+        except Exception as e:
+            transient = _is_transient_error(e)
+            if transient:
+                db_breaker.record_failure()
+            else:
+                # The database answered, so it is reachable
+                db_breaker.record_success()
+
+            if transient and attempt < DB_RETRY_ATTEMPTS - 1 and db_breaker.state != CircuitBreaker.OPEN:
+                delay = _backoff_delay(attempt)
+                attempt += 1
+                db_stats.retries += 1
+                logger.warning(f"Transient database error, retrying in {delay:.2f}s (attempt {attempt + 1}/{DB_RETRY_ATTEMPTS}): {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            if isinstance(e, asyncio.TimeoutError):
+                db_stats.timeouts += 1
+                logger.error(f"Database operation timed out after {DB_OPERATION_TIMEOUT}s")
+                raise
+            if is_unique_violation(e):
+                # Expected when concurrent writes race; callers decide what to do
+                db_stats.conflicts += 1
+                logger.info(f"Database operation hit a unique constraint: {str(e)}")
+                if isinstance(e, PrismaError):
+                    raise Exception(f"Database operation failed: {str(e)}") from e
+                raise
+            db_stats.errors += 1
+            if isinstance(e, PrismaError):
+                error_message = f"Database operation failed: {str(e)}"
+                logger.error(error_message)
+                logger.error(traceback.format_exc())
+                raise Exception(error_message) from e
+            error_message = f"Unexpected error during database operation: {str(e)}"
+            logger.error(error_message)
+            logger.error(traceback.format_exc())
+            raise
+
+async def execute_db_write(operation: Callable, *args: Any, **kwargs: Any) -> Optional[T]:
     """
+    Execute a write whose result the caller does not depend on.
+
+    If the database is unavailable (circuit open or retries exhausted on a
+    transient error) the write is kept in a local buffer and replayed in
+    order once the database recovers. Writes queued behind buffered ones
+    are buffered too, so ordering is preserved.
+
+    Args:
+        operation: The async function to execute
+        *args: Positional arguments to pass to the operation
+        **kwargs: Keyword arguments to pass to the operation
+
+    Returns:
+        The result of the operation, or None if the write was buffered
+    """
+    if _spill_buffer:
+        _spill_write(operation, args, kwargs)
+        return None
     try:
-        client = await get_prisma_client()
-        result = await operation(client, *args, **kwargs)
-        return result
-    except PrismaError as e:
-        error_message = f"Database operation failed: {str(e)}"
-        logger.error(error_message)
-        logger.error(traceback.format_exc())
-        raise Exception(error_message) from e
+        return await execute_db_operation(operation, *args, **kwargs)
+    except DatabaseUnavailableError:
+        _spill_write(operation, args, kwargs)
+        return None
     except Exception as e:
-        error_message = f"Unexpected error during database operation: {str(e)}"
-        logger.error(error_message)
-        logger.error(traceback.format_exc())
-        raise 
\ No newline at end of file
+        cause = e.__cause__ or e
+        if not _is_transient_error(cause):
+            raise
+        _spill_write(operation, args, kwargs)
+        return None
+
+def _spill_write(operation: Callable, args: tuple, kwargs: dict):
+    if len(_spill_buffer) >= DB_SPILL_BUFFER_SIZE:
+        _spill_buffer.popleft()
+        db_stats.errors += 1
+        logger.error(f"Database spill buffer full ({DB_SPILL_BUFFER_SIZE}), discarding oldest write")
+    _spill_buffer.append((operation, args, kwargs))
+    db_stats.spilled += 1
+    logger.warning(f"Database unavailable, buffered write ({len(_spill_buffer)} pending)")
+    _schedule_replay()
+
+def _schedule_replay():
+    global _replay_task
+
+    if _spill_buffer and (_replay_task is None or _replay_task.done()):
+        _replay_task = spawn(_replay_spilled_writes(), "db_replay")
+
+async def _replay_spilled_writes():
+    """Replay buffered writes in order, backing off while the database is down."""
+    while _spill_buffer:
+        if not db_breaker.allow_request():
+            await asyncio.sleep(max(DB_BREAKER_RESET_TIMEOUT - (time.monotonic() - db_breaker.opened_at), 0.1))
+            continue
+        operation, args, kwargs = _spill_buffer[0]
+        try:
+            await _run_operation(operation, *args, **kwargs)
+        except Exception as e:
+            if _is_transient_error(e):
+                db_breaker.record_failure()
+                await asyncio.sleep(_backoff_delay(DB_RETRY_ATTEMPTS))
+                continue
+            db_breaker.record_success()
+            db_stats.errors += 1
+            logger.error(f"Discarding buffered write that failed on replay: {str(e)}")
+        else:
+            db_breaker.record_success()
+            db_stats.replayed += 1
+        _spill_buffer.popleft()
+    logger.info("Replayed all buffered database writes")
+
+async def flush_spilled_writes(timeout: float = 10.0) -> int:
+    """
+    Wait for buffered writes to be replayed, e.g. before shutdown.
+
+    Args:
+        timeout: Maximum seconds to wait
+
+    Returns:
+        The number of writes still buffered
+    """
+    _schedule_replay()
+    if _replay_task is not None and not _replay_task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(_replay_task), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out replaying buffered writes, {len(_spill_buffer)} not written")
+    return len(_spill_buffer)
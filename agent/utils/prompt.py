@@ -1,4 +1,16 @@
-ai_prompt="""
+import functools
+import logging
+import re
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("prompt")
+
+# Rough token estimate used to compare prompt variants
+CHARS_PER_TOKEN = 4
+
+# Shared by every interview. It comes first and never changes, so the
+# provider can cache it as a common prefix across sessions.
+CORE_PROMPT = """
 You are an AI-powered Technical Interview Agent for Zoho Corporation. Your primary role is to conduct technical interviews with candidates, evaluate their skills, and provide feedback to the hiring team. You are professional, friendly, and focused on assessing candidates fairly and thoroughly.
 
 ## Core Principles
@@ -66,28 +78,6 @@ You are an AI-powered Technical Interview Agent for Zoho Corporation. Your prima
 - Provide a positive closing regardless of assessment
 - End the interview on a friendly, professional note
 
-## Position-Specific Guidelines
-
-### Software Development
-- Focus on: Algorithms, data structures, code quality, debugging skills
-- Ask about: Previous projects, preferred languages, development methodologies
-- Test understanding of: Object-oriented concepts, system design principles, testing approaches
-
-### Product Design
-- Focus on: User experience, design thinking, visual communication
-- Ask about: Portfolio work, design process, user research methods
-- Test understanding of: Design tools, prototyping, accessibility standards
-
-### Quality Assurance
-- Focus on: Testing methodologies, automation experience, attention to detail
-- Ask about: QA processes, bug tracking, test case development
-- Test understanding of: Manual vs. automated testing, performance testing, security testing
-
-### Data Science/Analytics
-- Focus on: Data modeling, statistical analysis, machine learning
-- Ask about: Previous data projects, tools and languages used, domain knowledge
-- Test understanding of: Data visualization, algorithm selection, data preprocessing
-
 ## Evaluation Criteria
 
 ### Technical Proficiency (40%)
@@ -247,4 +237,117 @@ Returns:
    - Provide a positive closing regardless of assessment
 
 Throughout every interaction, maintain a fair, professional assessment approach while creating a positive candidate experience. Your goal is to identify the best talent for Zoho while ensuring candidates feel respected in the process.
-"""
\ No newline at end of file
+"""
+
+ROLE_SECTIONS = {
+    "software": """### Software Development
+- Focus on: Algorithms, data structures, code quality, debugging skills
+- Ask about: Previous projects, preferred languages, development methodologies
+- Test understanding of: Object-oriented concepts, system design principles, testing approaches""",
+    "design": """### Product Design
+- Focus on: User experience, design thinking, visual communication
+- Ask about: Portfolio work, design process, user research methods
+- Test understanding of: Design tools, prototyping, accessibility standards""",
+    "qa": """### Quality Assurance
+- Focus on: Testing methodologies, automation experience, attention to detail
+- Ask about: QA processes, bug tracking, test case development
+- Test understanding of: Manual vs. automated testing, performance testing, security testing""",
+    "data": """### Data Science/Analytics
+- Focus on: Data modeling, statistical analysis, machine learning
+- Ask about: Previous data projects, tools and languages used, domain knowledge
+- Test understanding of: Data visualization, algorithm selection, data preprocessing""",
+}
+
+LEVEL_GUIDANCE = {
+    "ENTRY": "The candidate is applying at ENTRY level: favour fundamentals, learning ability and guided problem solving over system design.",
+    "MID": "The candidate is applying at MID level: expect independent delivery of features, solid fundamentals and some design trade-off discussion.",
+    "SENIOR": "The candidate is applying at SENIOR level: go deep on system design, trade-offs, debugging production issues and mentoring.",
+    "LEAD": "The candidate is applying at LEAD level: assess technical direction, design reviews, cross-team coordination and mentoring.",
+    "MANAGER": "The candidate is applying at MANAGER level: balance technical judgement with people management, planning and stakeholder communication.",
+    "EXECUTIVE": "The candidate is applying at EXECUTIVE level: focus on strategy, organisation building and technical vision over hands-on detail.",
+}
+
+# Words in the position title that select a role section (matched as whole words)
+ROLE_KEYWORDS = {
+    "design": ("design", "designer", "ux", "ui"),
+    "qa": ("qa", "quality", "test", "tester", "testing", "sdet"),
+    "data": ("data", "analytics", "analyst", "machine learning", "ml", "scientist"),
+    "software": ("software", "developer", "engineer", "programmer", "backend", "frontend", "full stack", "devops"),
+}
+
+# Role sections used when the position title does not name one
+DEPARTMENT_ROLES = {
+    "ENGINEERING": ("software",),
+    "PRODUCT": ("design",),
+    "DESIGN": ("design",),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def resolve_roles(position: Optional[str] = None, department: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Pick the role sections relevant to an interview.
+
+    Args:
+        position: Job position title
+        department: Department name (ENGINEERING, PRODUCT, etc.)
+
+    Returns:
+        Role section keys; all of them when the role is not known yet
+    """
+    title = (position or "").lower()
+    roles = tuple(
+        role for role, keywords in ROLE_KEYWORDS.items()
+        if any(re.search(rf"\b{re.escape(k)}\b", title) for k in keywords)
+    )
+    # "Data Engineer" or "QA Engineer" should not also pull in software development
+    if len(roles) > 1 and "software" in roles:
+        roles = tuple(role for role in roles if role != "software")
+    if not roles:
+        roles = DEPARTMENT_ROLES.get((department or "").upper(), ())
+    return tuple(sorted(roles)) if roles else tuple(ROLE_SECTIONS)
+
+
+@functools.lru_cache(maxsize=64)
+def _assemble(roles: Tuple[str, ...], level: Optional[str]) -> str:
+    sections = [CORE_PROMPT, "## Position-Specific Guidelines", ""]
+    sections.extend(f"{ROLE_SECTIONS[role]}\n" for role in roles)
+    if level in LEVEL_GUIDANCE:
+        sections.append(f"### Candidate Level\n- {LEVEL_GUIDANCE[level]}\n")
+    prompt = "\n".join(sections)
+    logger.debug(f"Built prompt for roles={roles} level={level}: ~{estimate_tokens(prompt)} tokens")
+    return prompt
+
+
+def build_prompt(position: Optional[str] = None, department: Optional[str] = None, level: Optional[str] = None) -> str:
+    """
+    Build the system prompt for an interview.
+
+    The shared CORE_PROMPT comes first, followed only by the guidelines for
+    the interview's role and level. Variants are cached, so the same
+    interview always gets the identical string.
+
+    Args:
+        position: Job position title
+        department: Department name (ENGINEERING, PRODUCT, etc.)
+        level: Job level (ENTRY, MID, SENIOR, LEAD, MANAGER, EXECUTIVE)
+
+    Returns:
+        The system prompt text
+    """
+    return _assemble(resolve_roles(position, department), (level or "").upper() or None)
+
+
+def prompt_variant_sizes() -> Dict[str, int]:
+    """Estimated token size of the shared prefix and of each single-role variant"""
+    sizes = {"core": estimate_tokens(CORE_PROMPT), "all_roles": estimate_tokens(ai_prompt)}
+    for role in ROLE_SECTIONS:
+        sizes[role] = estimate_tokens(_assemble((role,), None))
+    return sizes
+
+
+# Every role's guidelines, for when the position is not known yet
+ai_prompt = build_prompt()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Coroutine, Dict, Optional, Set, Tuple
+
+from .telemetry import register_gauge
+
+logger = logging.getLogger(__name__)
+
+# How often the event loop is probed, and the lag that is worth a warning (seconds)
+LOOP_PROBE_INTERVAL = float(os.environ.get("LOOP_PROBE_INTERVAL", "0.25"))
+LOOP_LAG_WARN = float(os.environ.get("LOOP_LAG_WARN", "0.1"))
+# Live tasks of one origin beyond this are reported as a possible leak
+TASK_COUNT_WARN = int(os.environ.get("TASK_COUNT_WARN", "100"))
+# Minimum seconds between two warnings about the same thing
+WARN_INTERVAL = 30.0
+# Probes kept for the recent maximum lag (one minute at the default interval)
+LAG_WINDOW = 240
+
+# Live tasks started through spawn(), by origin
+_tasks: Dict[str, Set[asyncio.Task]] = {}
+# Tasks that ended with an exception, by origin
+_failures: Dict[str, int] = {}
+# Backlogs checked on every probe: name -> (read, warn_at)
+_backlogs: Dict[str, Tuple[Callable[[], int], int]] = {}
+_last_warned: Dict[str, float] = {}
+
+
+def _gauge_name(value: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in value.lower())
+
+
+def _track_origin(origin: str):
+    if origin in _tasks:
+        return
+    _tasks[origin] = set()
+    _failures[origin] = 0
+    key = _gauge_name(origin)
+    register_gauge(f"voice_agent_tasks_{key}", f"Live background tasks started by {origin}", lambda: len(_tasks[origin]))
+    register_gauge(f"voice_agent_task_failures_{key}", f"Background tasks started by {origin} that failed", lambda: _failures[origin])
+
+
+def spawn(coro: Coroutine, origin: str, name: Optional[str] = None) -> asyncio.Task:
+    """
+    Start a background task that is tracked until it finishes.
+
+    The task is referenced until done, so it cannot be garbage collected
+    mid-flight, counted under `origin`, and an exception it ends with is
+    logged and counted instead of being lost.
+
+    Args:
+        coro: Coroutine to run
+        origin: What started the task, used to group the counts
+        name: Optional task name
+
+    Returns:
+        The started task
+    """
+    _track_origin(origin)
+    task = asyncio.create_task(coro, name=name)
+    _tasks[origin].add(task)
+    task.add_done_callback(lambda t: _task_done(origin, t))
+    return task
+
+
+def _task_done(origin: str, task: asyncio.Task):
+    _tasks[origin].discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        _failures[origin] += 1
+        logger.error(f"Background task {task.get_name()} ({origin}) failed: {error!r}", exc_info=error)
+
+
+def watch_backlog(name: str, read: Callable[[], int], warn_at: int, help: Optional[str] = None):
+    """
+    Check a queue depth on every probe and warn when it reaches `warn_at`.
+
+    The depth is also exposed as the gauge voice_agent_backlog_<name>.
+    """
+    _backlogs[name] = (read, warn_at)
+    register_gauge(f"voice_agent_backlog_{_gauge_name(name)}", help or f"Entries waiting in the {name} queue", read)
+
+
+def _warn(key: str, message: str, **extra: Any):
+    now = time.monotonic()
+    if now - _last_warned.get(key, float("-inf")) < WARN_INTERVAL:
+        return
+    _last_warned[key] = now
+    logger.warning(message, extra=extra)
+
+
+class LoopMonitor:
+    """
+    Measure event-loop lag with a periodic probe.
+
+    The probe sleeps for a fixed interval and records how late it wakes
+    up; anything blocking the loop (CPU-bound work, synchronous I/O) shows
+    up as lag long before audio playout starts to stutter. Each probe also
+    checks the watched backlogs and the live task counts.
+    """
+
+    def __init__(self, interval: float = LOOP_PROBE_INTERVAL):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.probes = 0
+        self._lags: deque = deque(maxlen=LAG_WINDOW)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="loop-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def max_lag(self) -> float:
+        """Largest lag over the recent probes"""
+        return max(self._lags, default=0.0)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.last_lag = lag
+            self._lags.append(lag)
+            self.probes += 1
+            if lag >= LOOP_LAG_WARN:
+                _warn("loop_lag", f"Event loop lagging by {lag * 1000:.0f}ms", loop_lag_ms=round(lag * 1000, 1))
+            self._check()
+
+    def _check(self):
+        for name, (read, warn_at) in _backlogs.items():
+            try:
+                depth = read()
+            except Exception as e:
+                logger.debug(f"Could not read backlog {name}: {e}")
+                continue
+            if depth >= warn_at:
+                _warn(f"backlog:{name}", f"{name} backlog at {depth} entries", backlog=name, depth=depth)
+        for origin, tasks in _tasks.items():
+            if len(tasks) >= TASK_COUNT_WARN:
+                _warn(f"tasks:{origin}", f"{len(tasks)} live {origin} tasks", origin=origin, tasks=len(tasks))
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> LoopMonitor:
+    """
+    Start the event-loop monitor on the running loop if it is not running.
+
+    Jobs run one at a time per process, so each job starts it and stops it
+    on shutdown; its gauges are served with the process's other metrics.
+    """
+    global _monitor
+
+    if _monitor is None:
+        _monitor = LoopMonitor()
+        register_gauge("voice_agent_event_loop_lag_seconds", "Event-loop lag at the latest probe", lambda: _monitor.last_lag)
+        register_gauge("voice_agent_event_loop_lag_max_seconds", "Largest event-loop lag over the last minute", lambda: _monitor.max_lag)
+        register_gauge("voice_agent_asyncio_tasks", "All live asyncio tasks on the monitored loop", _live_task_count)
+    _monitor.start()
+    return _monitor
+
+
+def _live_task_count() -> int:
+    task = _monitor._task if _monitor is not None else None
+    if task is None or task.done():
+        return 0
+    return len(asyncio.all_tasks(task.get_loop()))
+
+
+def get_task_stats() -> Dict[str, Any]:
+    """Live and failed background task counts by origin, and the loop lag"""
+    return {
+        "tasks": {origin: len(tasks) for origin, tasks in _tasks.items()},
+        "failures": dict(_failures),
+        "loop_lag_ms": round(_monitor.last_lag * 1000, 1) if _monitor else None,
+        "loop_lag_max_ms": round(_monitor.max_lag * 1000, 1) if _monitor else None,
+    }
@@ -0,0 +1,341 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job processes write their metrics here; the worker's main process serves them
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-metrics"))
+METRICS_WRITE_INTERVAL = float(os.environ.get("METRICS_WRITE_INTERVAL", "5"))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with one label dimension."""
+
+    def __init__(self, name: str, help: str, label: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # bucket counts, then +Inf count, sum
+                series = self._series[label_value] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {label_value: list(series) for label_value, series in self._series.items()}
+
+    def render(self, merged: Optional[Dict[str, List[float]]] = None) -> List[str]:
+        """Render this histogram, or the given series (e.g. summed over processes) in its place"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_by_label = self._series if merged is None else merged
+            for label_value, series in sorted(series_by_label.items()):
+                labels = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {int(count)}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {int(series[-2])}')
+                lines.append(f"{self.name}_count{{{labels}}} {int(series[-2])}")
+                lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+        return lines
+
+
+latency_histogram = Histogram(
+    "voice_agent_latency_seconds",
+    "Latency of each stage of a conversational turn",
+    "stage"
+)
+
+# Gauges are read when the metrics are rendered
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+# Counters only go up: name -> [help, value]
+_counters: Dict[str, List[Any]] = {}
+_counter_lock = threading.Lock()
+
+# Per-interview totals: interview id -> stage -> [count, total seconds]
+_interview_timings: Dict[str, Dict[str, List[float]]] = {}
+_interview_lock = threading.Lock()
+
+# Collects timings recorded by the current task (e.g. one tool call)
+_scope: ContextVar[Optional[Dict[str, float]]] = ContextVar("timing_scope", default=None)
+
+
+def register_gauge(name: str, help: str, read: Callable[[], float]):
+    """Expose a value computed at scrape time."""
+    _gauges[name] = (help, read)
+
+
+def increment_counter(name: str, help: str, value: float = 1):
+    """Add to a process-wide counter; counters are summed over processes when served."""
+    with _counter_lock:
+        counter = _counters.setdefault(name, [help, 0.0])
+        counter[1] += value
+
+
+def record_timing(stage: str, seconds: float, interview_id: Optional[str] = None):
+    """
+    Record how long a stage took.
+
+    The value goes into the process-wide histogram, the per-interview totals
+    when an interview id is given, and the enclosing timing_scope if any.
+    """
+    latency_histogram.observe(stage, seconds)
+    if interview_id:
+        with _interview_lock:
+            stages = _interview_timings.setdefault(interview_id, {})
+            totals = stages.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+    scope = _scope.get()
+    if scope is not None:
+        scope[stage] = scope.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timing_scope() -> Iterator[Dict[str, float]]:
+    """Collect the timings recorded inside the block (and tasks it starts), by stage."""
+    collected: Dict[str, float] = {}
+    token = _scope.set(collected)
+    try:
+        yield collected
+    finally:
+        _scope.reset(token)
+
+
+def pop_interview_timings(interview_id: str) -> Dict[str, Dict[str, float]]:
+    """Remove and return the per-interview stage totals."""
+    with _interview_lock:
+        stages = _interview_timings.pop(interview_id, {})
+    return {
+        stage: {"count": int(count), "total_ms": round(total * 1000, 1)}
+        for stage, (count, total) in stages.items()
+    }
+
+
+def clear_interview_timings():
+    """Drop the per-interview totals that were never popped; called when a job ends"""
+    with _interview_lock:
+        _interview_timings.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    """Current metric values of this process"""
+    gauges = {}
+    for name, (help, read) in _gauges.items():
+        try:
+            gauges[name] = [help, float(read())]
+        except Exception as e:
+            logger.warning(f"Could not read gauge {name}: {e}")
+    with _counter_lock:
+        counters = {name: list(counter) for name, counter in _counters.items()}
+    return {"pid": os.getpid(), "histogram": latency_histogram.snapshot(), "gauges": gauges, "counters": counters}
+
+
+def _add_histogram(totals: Dict[str, List[float]], histogram: Dict[str, List[float]]):
+    for label_value, series in histogram.items():
+        merged = totals.setdefault(label_value, [0.0] * len(series))
+        for i, value in enumerate(series):
+            merged[i] += value
+
+
+def _add_counters(totals: Dict[str, List[Any]], counters: Dict[str, List[Any]]):
+    for name, (help, value) in counters.items():
+        totals.setdefault(name, [help, 0.0])[1] += value
+
+
+def render_prometheus(snapshots: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    Histograms and counters are summed over the snapshots and gauges are
+    reported per process with a pid label. Without snapshots this process's
+    own metrics are rendered.
+    """
+    if snapshots is None:
+        snapshots = [snapshot()]
+
+    merged: Dict[str, List[float]] = {}
+    counters: Dict[str, List[Any]] = {}
+    gauges: Dict[str, Tuple[str, List[Tuple[int, float]]]] = {}
+    for snap in snapshots:
+        _add_histogram(merged, snap["histogram"])
+        _add_counters(counters, snap.get("counters", {}))
+        for name, (help, value) in snap.get("gauges", {}).items():
+            gauges.setdefault(name, (help, []))[1].append((snap["pid"], value))
+
+    lines = latency_histogram.render(merged)
+    for name, (help, value) in sorted(counters.items()):
+        lines.extend([f"# HELP {name} {help}", f"# TYPE {name} counter", f"{name} {value}"])
+    for name, (help, values) in sorted(gauges.items()):
+        lines.extend([f"# HELP {name} {help}", f"# TYPE {name} gauge"])
+        lines.extend(f'{name}{{pid="{pid}"}} {value}' for pid, value in values)
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(directory: str = METRICS_DIR):
+    """Write this process's metrics for the metrics server, replacing the previous snapshot"""
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write metrics snapshot: {e}")
+
+
+_writer_started = False
+
+def start_metrics_writer(directory: str = METRICS_DIR, interval: float = METRICS_WRITE_INTERVAL):
+    """
+    Write this process's metrics every `interval` seconds from a daemon thread.
+
+    Called in each job process; serve_metrics in the worker's main process
+    combines the snapshots.
+    """
+    global _writer_started
+
+    if _writer_started:
+        return
+    _writer_started = True
+    os.makedirs(directory, exist_ok=True)
+
+    def run():
+        while True:
+            write_snapshot(directory)
+            time.sleep(interval)
+
+    threading.Thread(target=run, name="metrics-writer", daemon=True).start()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Histograms and counters of job processes that have exited, folded in by read_snapshots
+_retired_histogram: Dict[str, List[float]] = {}
+_retired_counters: Dict[str, List[Any]] = {}
+_retired_lock = threading.Lock()
+
+
+def read_snapshots(directory: str = METRICS_DIR) -> List[Dict[str, Any]]:
+    """
+    Load the snapshots written by running job processes.
+
+    Job processes are single-use, so the snapshot of one that has exited is
+    folded into a running total kept by this process and its file deleted;
+    the totals never go backwards and the directory only holds live
+    processes. The total is returned as one more snapshot without gauges.
+    """
+    snapshots = []
+    with _retired_lock:
+        for entry in os.scandir(directory):
+            pid = entry.name.split(".", 1)[0]
+            if not pid.isdigit():
+                continue
+            if _pid_alive(int(pid)):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    pass
+                continue
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path) as f:
+                        snap = json.load(f)
+                    _add_histogram(_retired_histogram, snap["histogram"])
+                    _add_counters(_retired_counters, snap.get("counters", {}))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Could not read metrics snapshot {entry.name}: {e}")
+            # Left-over temporary files of the exited process go as well
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        retired = {label_value: list(series) for label_value, series in _retired_histogram.items()}
+        retired_counters = {name: list(counter) for name, counter in _retired_counters.items()}
+    snapshots.append({"pid": os.getpid(), "histogram": retired, "gauges": {}, "counters": retired_counters})
+    return snapshots
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0", directory: str = METRICS_DIR) -> bool:
+    """
+    Serve the combined metrics of all job processes at /metrics.
+
+    Runs in a daemon thread of the worker's main process, so the endpoint
+    lives as long as the worker rather than any one job.
+
+    Returns:
+        True if the endpoint is being served
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # Snapshots from a previous run of the worker are stale
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(read_snapshots(directory)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.error(f"Metrics port {port} unavailable: {e}")
+        return False
+
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return True
+
+
+@contextmanager
+def timed(stage: str, interview_id: Optional[str] = None) -> Iterator[None]:
+    """Record the duration of the block as `stage`."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, time.perf_counter() - started_at, interview_id)
@@ -118,6 +118,24 @@ io.on('connection', (socket) => {
         }
     });
 
+    // Listen for transcript entries the agent has already persisted.
+    // The agent writes the row itself, so this only relays it to the room.
+    socket.on('broadcast-transcript', (data) => {
+        const { id, interviewId, speakerType, content, timestamp } = data;
+        if (!id || !interviewId) {
+            socket.emit('error', { message: 'Invalid transcript broadcast' });
+            return;
+        }
+
+        io.to(`interview-${interviewId}`).emit('transcript-update', {
+            id,
+            interviewId,
+            speakerType,
+            content,
+            timestamp
+        });
+    });
+
     // Listen for evaluation updates
     socket.on('update-evaluation', async (data) => {
         try {